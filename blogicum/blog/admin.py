@@ -1,8 +1,9 @@
 from django.contrib import admin
 
-from .models import Location, Category, Post, Comment
+from .models import AuthorStats, Location, Category, Post, Comment
 
 admin.site.register(Category)
 admin.site.register(Location)
 admin.site.register(Post)
 admin.site.register(Comment)
+admin.site.register(AuthorStats)
@@ -0,0 +1,161 @@
+"""Read-only JSON API, версия 1.
+
+Ответы собираются из строк .values(), без создания объектов моделей.
+Списки листаются курсором (?cursor=), поля выбираются параметром
+?fields=id,title,... Правила видимости те же, что у HTML-страниц.
+"""
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
+
+from ..cache import conditional_page
+from ..models import Category, Comment, Post
+from ..pagination import KeysetPaginator
+
+# Поле ответа: поля для .values() и функция, собирающая из них значение
+POST_FIELDS = {
+    'id': (('id',), None),
+    'title': (('title',), None),
+    'text': (('text',), None),
+    'pub_date': (('pub_date',), None),
+    'updated_at': (('updated_at',), None),
+    'author': (('author__username',), None),
+    'category': (('category__slug',), None),
+    'location': (
+        ('location__name', 'location__is_published'),
+        lambda name, is_published: name if is_published else None
+    ),
+    'image': (
+        ('image',),
+        lambda name: default_storage.url(name) if name else None
+    ),
+    'comment_count': (('comment_count',), None),
+}
+COMMENT_FIELDS = {
+    'id': (('id',), None),
+    'author': (('author__username',), None),
+    'text': (('text',), None),
+    'created_at': (('created_at',), None),
+    'updated_at': (('updated_at',), None),
+}
+CATEGORY_FIELDS = {
+    'slug': (('slug',), None),
+    'title': (('title',), None),
+    'description': (('description',), None),
+}
+POST_ORDERING = ('-pub_date', '-id')
+COMMENT_ORDERING = ('created_at', 'id')
+CATEGORY_ORDERING = ('id',)
+
+
+class UnknownFields(ValueError):
+    pass
+
+
+def json_response(data, status=200):
+    return JsonResponse(
+        data, status=status, json_dumps_params={'ensure_ascii': False}
+    )
+
+
+def error_response(message, status):
+    return json_response({'error': message}, status)
+
+
+def get_field_names(request, spec):
+    fields = request.GET.get('fields')
+    if not fields:
+        return list(spec)
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in spec]
+    if unknown:
+        raise UnknownFields(', '.join(unknown))
+    return names
+
+
+def get_lookups(names, spec, extra=()):
+    # Порядок сохраняем, повторы убираем: поля сортировки нужны курсору
+    lookups = dict.fromkeys(extra)
+    for name in names:
+        lookups.update(dict.fromkeys(spec[name][0]))
+    return list(lookups)
+
+
+def serialize(row, names, spec):
+    result = {}
+    for name in names:
+        lookups, convert = spec[name]
+        values = [row[lookup] for lookup in lookups]
+        result[name] = convert(*values) if convert else values[0]
+    return result
+
+
+def page_link(request, exists, query):
+    return f'{request.path}?{query}' if exists else None
+
+
+def list_response(request, queryset, spec, ordering):
+    try:
+        names = get_field_names(request, spec)
+    except UnknownFields as error:
+        return error_response(f'Unknown fields: {error}.', 400)
+    rows = queryset.order_by(*ordering).values(
+        *get_lookups(names, spec, (name.lstrip('-') for name in ordering))
+    )
+    page = KeysetPaginator(rows, settings.API_PAGE_SIZE).get_page(
+        request.GET.get('cursor'), request.GET
+    )
+    return json_response({
+        'results': [serialize(row, names, spec) for row in page],
+        'next': page_link(request, page.has_next(), page.next_query),
+        'previous': page_link(
+            request, page.has_previous(), page.previous_query
+        ),
+    })
+
+
+@require_safe
+@conditional_page('index')
+def post_list(request):
+    posts = Post.objects.published()
+    if 'category' in request.GET:
+        posts = posts.filter(category__slug=request.GET['category'])
+    if 'author' in request.GET:
+        posts = posts.filter(author__username=request.GET['author'])
+    return list_response(request, posts, POST_FIELDS, POST_ORDERING)
+
+
+@require_safe
+@conditional_page('post:{post_id}')
+def post_detail(request, post_id):
+    try:
+        names = get_field_names(request, POST_FIELDS)
+    except UnknownFields as error:
+        return error_response(f'Unknown fields: {error}.', 400)
+    row = Post.objects.visible_to(request.user).filter(pk=post_id).values(
+        *get_lookups(names, POST_FIELDS)
+    ).first()
+    if row is None:
+        return error_response('Not found.', 404)
+    return json_response(serialize(row, names, POST_FIELDS))
+
+
+@require_safe
+@conditional_page('post:{post_id}')
+def comment_list(request, post_id):
+    if not Post.objects.visible_to(request.user).filter(pk=post_id).exists():
+        return error_response('Not found.', 404)
+    comments = Comment.objects.filter(post_id=post_id)
+    return list_response(
+        request, comments, COMMENT_FIELDS, COMMENT_ORDERING
+    )
+
+
+@require_safe
+@conditional_page()
+def category_list(request):
+    categories = Category.objects.filter(is_published=True)
+    return list_response(
+        request, categories, CATEGORY_FIELDS, CATEGORY_ORDERING
+    )
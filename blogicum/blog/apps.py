@@ -5,3 +5,8 @@ class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        from . import db, signals  # noqa: F401
+        from .query_budget import track_lazy_loads
+        track_lazy_loads()
@@ -0,0 +1,403 @@
+"""Нагрузочный прогон страниц блога на синтетических данных.
+
+seed_dataset() заполняет базу публикациями с перекошенным (степенным)
+распределением комментариев, run_scenarios() прогоняет адреса через
+WSGI-обработчик тестового клиента Django в том же процессе и собирает
+задержки, число SQL-запросов и размер ответов.
+
+compare_feed_rows() сравнивает память и время процессора на страницу
+ленты из моделей и из строк blog.read_models.
+
+sqlite_contention() отдельно меряет, как файл SQLite с заданными PRAGMA
+выдерживает одновременные чтение и добавление комментариев.
+"""
+import random
+import sqlite3
+import statistics
+import threading
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.template.loader import render_to_string
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .cache import CARD_TEMPLATE, invalidate
+from .catalog import attach_catalog
+from .db import apply_pragmas
+from .importing import after_insert, insert_objects
+from .models import Category, Comment, Location, Post
+from .read_models import post_rows, to_post_rows
+
+BATCH_SIZE = 5000
+WORDS = (
+    'утро вечер город море лес дорога письмо обед друг книга поезд '
+    'дождь снег солнце окно сад река музыка кофе разговор'
+).split()
+
+
+def make_text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def comment_counts(rng, posts, comments):
+    # Парето: у немногих публикаций большая часть комментариев
+    weights = [rng.paretovariate(1.2) for _ in range(posts)]
+    scale = comments / sum(weights)
+    return [int(weight * scale) for weight in weights]
+
+
+def insert(model, objects):
+    with transaction.atomic():
+        insert_objects(model, objects, 'default')
+        after_insert(model, objects, 'default')
+
+
+def seed_dataset(posts, comments_per_post=5, seed=1, log=None):
+    """Создаёт авторов, категории, места, публикации и комментарии."""
+    rng = random.Random(seed)
+    User = get_user_model()
+    now = timezone.now()
+    # SQLite не возвращает pk из bulk_create, поэтому объекты
+    # перечитываются
+    User.objects.bulk_create([
+        User(username=f'bench-{seed}-{i}', email=f'bench{i}@example.com')
+        for i in range(max(10, posts // 100))
+    ])
+    authors = list(User.objects.filter(
+        username__startswith=f'bench-{seed}-'
+    ))
+    Category.objects.bulk_create([
+        Category(
+            title=f'Категория {i}', description=make_text(rng, 20),
+            slug=f'bench-{seed}-{i}', is_published=i != 0
+        )
+        for i in range(10)
+    ])
+    categories = list(Category.objects.filter(
+        slug__startswith=f'bench-{seed}-'
+    ))
+    Location.objects.bulk_create([
+        Location(name=f'Место {i}') for i in range(20)
+    ])
+    locations = list(Location.objects.order_by('-pk')[:20])
+    # bulk_create не отправляет сигналы: снимок каталога обновляется явно
+    invalidate('catalog')
+    first_pk = (Post.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    ).first() or 0) + 1
+    for start in range(0, posts, BATCH_SIZE):
+        batch = [
+            Post(
+                pk=first_pk + i,
+                title=make_text(rng, 4),
+                text=make_text(rng, rng.randint(20, 200)),
+                # Несколько процентов — отложенные и снятые с публикации
+                pub_date=now - timedelta(minutes=rng.randint(-1000, 10**6)),
+                is_published=rng.random() > 0.03,
+                author=rng.choice(authors),
+                category=rng.choice(categories),
+                location=rng.choice(locations + [None]),
+                created_at=now,
+                updated_at=now,
+            )
+            for i in range(start, min(start + BATCH_SIZE, posts))
+        ]
+        insert(Post, batch)
+        if log:
+            log(f'Публикаций: {start + len(batch)}')
+    counts = comment_counts(rng, posts, posts * comments_per_post)
+    batch = []
+    created = 0
+    for offset, count in enumerate(counts):
+        for _ in range(count):
+            batch.append(Comment(
+                post_id=first_pk + offset,
+                author=rng.choice(authors),
+                text=make_text(rng, rng.randint(5, 40)),
+                created_at=now,
+                updated_at=now,
+            ))
+            if len(batch) == BATCH_SIZE:
+                insert(Comment, batch)
+                created += len(batch)
+                batch = []
+                if log:
+                    log(f'Комментариев: {created}')
+    if batch:
+        insert(Comment, batch)
+
+
+def build_scenarios(posts_per_page):
+    """Список (имя, метод, адрес, данные) для прогона."""
+    visible = Post.objects.published()
+    busiest = visible.order_by('-comment_count', '-pk').first()
+    typical = visible.order_by('pk')[visible.count() // 2]
+    category = Category.objects.filter(
+        is_published=True
+    ).annotate(posts=Count('post')).order_by('-posts').first()
+    author = get_user_model().objects.annotate(
+        posts=Count('post')
+    ).order_by('-posts').first()
+    deep_page = max(1, visible.count() // posts_per_page)
+    return [
+        ('index', 'get', '/', None),
+        ('index_deep_page', 'get', f'/?page={deep_page}', None),
+        ('post_detail_busiest', 'get', f'/posts/{busiest.pk}/', None),
+        ('post_detail_typical', 'get', f'/posts/{typical.pk}/', None),
+        ('category_posts', 'get', f'/category/{category.slug}/', None),
+        ('user_profile', 'get', f'/profile/{author.username}/', None),
+        ('search', 'get', '/search/?q=море', None),
+        ('api_posts', 'get', '/api/v1/posts/', None),
+        ('feed', 'get', '/feed/', None),
+        ('pages_about', 'get', '/pages/about/', None),
+        ('pages_rules', 'get', '/pages/rules/', None),
+        (
+            'add_comment', 'post', f'/posts/{typical.pk}/comment/',
+            {'text': 'Комментарий из бенчмарка'}
+        ),
+    ]
+
+
+def percentile(quantiles, value):
+    return round(quantiles[value - 1] * 1000, 3)
+
+
+def measure(client, method, url, data, repeat, warmup):
+    timings, queries, sizes, statuses = [], [], [], set()
+    for attempt in range(warmup + repeat):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data or {})
+            content = (
+                b''.join(response.streaming_content) if response.streaming
+                else response.content
+            )
+            elapsed = time.perf_counter() - started
+        if attempt < warmup:
+            continue
+        timings.append(elapsed)
+        queries.append(len(captured))
+        sizes.append(len(content))
+        statuses.add(response.status_code)
+    quantiles = statistics.quantiles(timings, n=100, method='inclusive')
+    return {
+        'p50_ms': percentile(quantiles, 50),
+        'p95_ms': percentile(quantiles, 95),
+        'p99_ms': percentile(quantiles, 99),
+        'mean_ms': round(statistics.fmean(timings) * 1000, 3),
+        'queries': round(statistics.fmean(queries), 2),
+        'bytes': round(statistics.fmean(sizes)),
+        'status': sorted(statuses),
+    }
+
+
+def run_scenarios(scenarios, repeat=50, warmup=5, page_cache=True):
+    """Прогоняет сценарии анонимно и от имени вошедшего пользователя.
+
+    POST-сценарии требуют входа и выполняются только для вошедшего.
+    """
+    user = get_user_model().objects.order_by('pk').first()
+    # Имя хоста из ALLOWED_HOSTS, иначе вместо страниц будут ответы 400
+    authenticated = Client(SERVER_NAME='localhost')
+    authenticated.force_login(user)
+    clients = (
+        ('anonymous', Client(SERVER_NAME='localhost')),
+        ('authenticated', authenticated),
+    )
+    results = []
+    overrides = {
+        'QUERY_BUDGET_STRICT': False, 'QUERY_BUDGET_SAMPLE_RATE': 0,
+    }
+    if not page_cache:
+        overrides['BLOG_PAGE_CACHE_TIMEOUT'] = 0
+    with override_settings(**overrides):
+        for name, method, url, data in scenarios:
+            for role, client in clients:
+                if method != 'get' and role == 'anonymous':
+                    continue
+                # У каждого сценария свой холодный старт кэша
+                for cache in caches.all():
+                    cache.clear()
+                result = {
+                    'name': name, 'method': method.upper(), 'url': url,
+                    'user': role,
+                }
+                result.update(
+                    measure(client, method, url, data, repeat, warmup)
+                )
+                results.append(result)
+    return results
+
+
+def load_feed_page(read_models, per_page):
+    posts = Post.objects.select_related('author').published().order_by(
+        *Post._meta.ordering
+    )
+    if read_models:
+        return to_post_rows(post_rows(posts)[:per_page])
+    posts = list(posts[:per_page])
+    attach_catalog(posts)
+    return posts
+
+
+def compare_feed_rows(per_page, repeat=20):
+    """Страница ленты из моделей Post и из PostRow.
+
+    retained_kib — память объектов страницы, peak_kib — пик при их
+    загрузке, cpu_ms — время процессора на загрузку и рендер карточек
+    без кэша.
+    """
+    results = {}
+    for name, read_models in (('models', False), ('rows', True)):
+        load_feed_page(read_models, per_page)
+        tracemalloc.start()
+        page = load_feed_page(read_models, per_page)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del page
+        started = time.process_time()
+        for _ in range(repeat):
+            for post in load_feed_page(read_models, per_page):
+                render_to_string(CARD_TEMPLATE, {'post': post})
+        results[name] = {
+            'retained_kib': round(retained / 1024, 1),
+            'peak_kib': round(peak / 1024, 1),
+            'cpu_ms': round(
+                (time.process_time() - started) / repeat * 1000, 3
+            ),
+        }
+    return results
+
+
+CONTENTION_SCHEMA = (
+    'CREATE TABLE post (id INTEGER PRIMARY KEY, title TEXT, '
+    'comment_count INTEGER NOT NULL DEFAULT 0)',
+    'CREATE TABLE comment (id INTEGER PRIMARY KEY, post_id INTEGER, '
+    'text TEXT, created_at REAL)',
+    'CREATE INDEX comment_post_idx ON comment (post_id, id)',
+)
+
+
+def connect(path, pragmas, timeout):
+    # Как в Django: автофиксация, транзакции открываются явно
+    db = sqlite3.connect(
+        path, timeout=timeout, isolation_level=None, check_same_thread=False
+    )
+    apply_pragmas(db.cursor(), pragmas)
+    return db
+
+
+def create_contention_db(path, posts):
+    db = sqlite3.connect(path, isolation_level=None)
+    for statement in CONTENTION_SCHEMA:
+        db.execute(statement)
+    db.execute('BEGIN')
+    db.executemany(
+        'INSERT INTO post (id, title) VALUES (?, ?)',
+        ((pk, f'Публикация {pk}') for pk in range(1, posts + 1))
+    )
+    db.execute('COMMIT')
+    db.close()
+
+
+def read_page(db, rng, posts):
+    db.execute(
+        'SELECT id, title, comment_count FROM post ORDER BY id DESC '
+        'LIMIT 10 OFFSET ?', (rng.randrange(posts),)
+    ).fetchall()
+    db.execute(
+        'SELECT id, text FROM comment WHERE post_id = ? ORDER BY id '
+        'LIMIT 50', (rng.randint(1, posts),)
+    ).fetchall()
+
+
+def add_comment(db, rng, posts):
+    post_id = rng.randint(1, posts)
+    db.execute('BEGIN')
+    try:
+        db.execute(
+            'INSERT INTO comment (post_id, text, created_at) '
+            'VALUES (?, ?, ?)', (post_id, make_text(rng, 20), time.time())
+        )
+        db.execute(
+            'UPDATE post SET comment_count = comment_count + 1 '
+            'WHERE id = ?', (post_id,)
+        )
+        db.execute('COMMIT')
+    except sqlite3.OperationalError:
+        db.execute('ROLLBACK')
+        raise
+
+
+def contention_worker(action, db, seed, posts, deadline, stats, lock):
+    rng = random.Random(seed)
+    timings, errors = [], 0
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            action(db, rng, posts)
+        except sqlite3.OperationalError:
+            # «database is locked»: ожидание busy_timeout не помогло
+            errors += 1
+            continue
+        timings.append(time.perf_counter() - started)
+    with lock:
+        stats['timings'] += timings
+        stats['errors'] += errors
+
+
+def summarize(stats, seconds):
+    timings = stats['timings']
+    result = {
+        'ops_per_second': round(len(timings) / seconds, 1),
+        'errors': stats['errors'],
+    }
+    if len(timings) >= 2:
+        quantiles = statistics.quantiles(timings, n=100, method='inclusive')
+        result.update({
+            'p50_ms': percentile(quantiles, 50),
+            'p95_ms': percentile(quantiles, 95),
+            'p99_ms': percentile(quantiles, 99),
+        })
+    return result
+
+
+def sqlite_contention(path, pragmas, readers=8, writers=4, seconds=5.0,
+                      posts=1000, timeout=5.0):
+    """Читатели и писатели одновременно работают с файлом path.
+
+    Каждый поток держит своё соединение, как процесс или поток
+    веб-сервера. Возвращает пропускную способность, задержки и число
+    ошибок блокировки отдельно для чтения и записи.
+    """
+    create_contention_db(path, posts)
+    lock = threading.Lock()
+    stats = {
+        'read': {'timings': [], 'errors': 0},
+        'write': {'timings': [], 'errors': 0},
+    }
+    roles = [('read', read_page)] * readers + [('write', add_comment)] * (
+        writers
+    )
+    databases = [connect(path, pragmas, timeout) for _ in roles]
+    deadline = time.monotonic() + seconds
+    threads = [
+        threading.Thread(target=contention_worker, args=(
+            action, db, number, posts, deadline, stats[role], lock
+        ))
+        for number, ((role, action), db) in enumerate(zip(roles, databases))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for db in databases:
+        db.close()
+    return {role: summarize(stats[role], seconds) for role in stats}
@@ -0,0 +1,284 @@
+import hashlib
+import math
+import time
+from functools import partial, wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.urls import resolve
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.utils.http import http_date, quote_etag
+from django.utils.safestring import mark_safe
+
+from .models import Category, Post
+from .routers import read_primary_if_stale
+
+# Версии групп страниц. Ключ кэша страницы включает версии всех групп,
+# от которых она зависит, поэтому инвалидация — это увеличение версии.
+VERSION_KEY = 'blog:version:{}'
+# Время последнего изменения группы (Unix time) для Last-Modified
+CHANGED_KEY = 'blog:changed:{}'
+PAGE_KEY = 'blog:page:{}:{}'
+# Карточка публикации: id, время изменения, число комментариев и версия
+# каталога (категории, места, имена авторов)
+CARD_KEY = 'blog:card:{}:{}:{}:{}'
+CARD_TEMPLATE = 'includes/post_card.html'
+# Параметры запроса, которые меняют содержимое ленты
+PAGE_QUERY_PARAMS = ('page', 'cursor')
+
+
+def get_cache():
+    return caches[settings.BLOG_CACHE_ALIAS]
+
+
+def read_counters(keys, initial):
+    cache = get_cache()
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            # Счётчик вытеснен или ещё не создан: начальное значение
+            # не должно совпасть со старыми ключами страниц
+            cache.add(key, initial(key), None)
+            values[key] = cache.get(key)
+    return [values[key] for key in keys]
+
+
+def get_versions(groups):
+    return read_counters(
+        [VERSION_KEY.format(group) for group in groups],
+        lambda key: time.time_ns()
+    )
+
+
+def get_changed(groups, initial=None):
+    """Время последнего изменения групп.
+
+    Если отметки нет, она берётся из initial() (например, из updated_at
+    моделей), а без него считается, что группа изменилась только что.
+    """
+    catalog_key = CHANGED_KEY.format('catalog')
+
+    def get_initial(key):
+        if initial is None or key == catalog_key:
+            return time.time()
+        return initial() or time.time()
+
+    return read_counters(
+        [CHANGED_KEY.format(group) for group in groups], get_initial
+    )
+
+
+def bump_versions(*groups):
+    cache = get_cache()
+    groups = set(groups)
+    for group in groups:
+        key = VERSION_KEY.format(group)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+    now = time.time()
+    cache.set_many(
+        {CHANGED_KEY.format(group): now for group in groups}, None
+    )
+
+
+def invalidate(*groups):
+    bump_versions(*groups)
+    if connection.in_atomic_block:
+        # Повторно после коммита: иначе параллельный запрос может успеть
+        # закэшировать страницу со старыми данными до конца транзакции
+        transaction.on_commit(partial(bump_versions, *groups))
+
+
+def invalidate_posts(posts, category_ids=(), user_ids=()):
+    posts = list(posts)
+    category_ids = {post.category_id for post in posts} | set(category_ids)
+    slugs = Category.objects.filter(
+        pk__in=category_ids - {None}
+    ).values_list('slug', flat=True)
+    invalidate(
+        'index',
+        *(f'post:{post.pk}' for post in posts),
+        *(f'category:{slug}' for slug in slugs),
+        *profile_groups({post.author_id for post in posts} | set(user_ids)),
+    )
+
+
+def profile_groups(user_ids):
+    usernames = get_user_model().objects.filter(
+        pk__in=set(user_ids) - {None}
+    ).values_list('username', flat=True)
+    return [f'profile:{username}' for username in usernames]
+
+
+def invalidate_post_id(post_id, user_ids=()):
+    post = Post.objects.filter(pk=post_id).only(
+        'category_id', 'author_id'
+    ).first()
+    if post is None:
+        invalidate(f'post:{post_id}', *profile_groups(user_ids))
+    else:
+        invalidate_posts([post], user_ids=user_ids)
+
+
+def page_cache_key(request, groups):
+    query = '&'.join(
+        f'{name}={request.GET[name]}'
+        for name in PAGE_QUERY_PARAMS if name in request.GET
+    )
+    path = hashlib.md5(
+        f'{request.path}?{query}'.encode()
+    ).hexdigest()
+    versions = '.'.join(str(version) for version in get_versions(groups))
+    return PAGE_KEY.format(path, versions)
+
+
+def cache_anonymous_page(*groups):
+    """Кэширует страницу для анонимных GET-запросов.
+
+    Группы — шаблоны вида 'post:{post_id}', подставляются аргументы
+    представления. Группа 'catalog' добавляется всегда.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            timeout = settings.BLOG_PAGE_CACHE_TIMEOUT
+            if (not timeout or request.method not in ('GET', 'HEAD')
+                    or request.user.is_authenticated):
+                return view(request, *args, **kwargs)
+            key = page_cache_key(request, [
+                'catalog', *(group.format(**kwargs) for group in groups)
+            ])
+            cache = get_cache()
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+            response = view(request, *args, **kwargs)
+            if (response.status_code == 200 and not response.streaming
+                    and not response.cookies):
+                cache.set(
+                    key, (response.content, response['Content-Type']), timeout
+                )
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def conditional_page(*groups, last_modified=None):
+    """Отвечает 304 Not Modified, если страница не менялась.
+
+    ETag строится из версий групп, Last-Modified — из времени их
+    изменения. Пока отметки времени нет в кэше, она вычисляется функцией
+    last_modified(request, **kwargs), если та передана.
+
+    Страница вошедшего пользователя зависит ещё и от него самого (шапка,
+    кнопки, CSRF-токен в формах), поэтому в ETag добавляются id
+    пользователя и CSRF-cookie.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            names = ['catalog', *(group.format(**kwargs) for group in groups)]
+            parts = [str(version) for version in get_versions(names)]
+            initial = None
+            if last_modified is not None:
+                initial = partial(last_modified, request, *args, **kwargs)
+            modified = max(get_changed(names, initial))
+            # Реплика старше страницы: старые данные под новым ETag
+            read_primary_if_stale(modified)
+            authenticated = request.user.is_authenticated
+            if authenticated:
+                parts += [
+                    str(request.user.pk),
+                    request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+                ]
+            etag = quote_etag(
+                hashlib.md5(':'.join(parts).encode()).hexdigest()
+            )
+            # HTTP-дата с точностью до секунды: вверх, чтобы изменение
+            # не оказалось старше отданной клиенту отметки
+            modified = math.ceil(modified)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=modified
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    response.headers.setdefault('ETag', etag)
+                    # Пока секунда изменения не прошла, следующее
+                    # изменение получит ту же отметку; прошедшая секунда
+                    # не даст по If-Modified-Since устаревший 304.
+                    # Заменяет и отметку Feed (updated_at новейшей
+                    # записи): она не меняется, когда запись скрыли
+                    response['Last-Modified'] = http_date(
+                        min(modified, int(time.time()))
+                    )
+            patch_vary_headers(response, ('Cookie',))
+            if authenticated:
+                # Личную страницу не должны хранить общие кэши
+                patch_cache_control(response, private=True)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def warm_pages(paths):
+    # Заполняет кэш страниц так, как их увидит анонимный читатель
+    factory = RequestFactory()
+    for path in paths:
+        match = resolve(path)
+        request = factory.get(path)
+        request.user = AnonymousUser()
+        match.func(request, *match.args, **match.kwargs)
+
+
+def attach_post_cards(posts):
+    """Добавляет публикациям готовый HTML карточки в post.card_html.
+
+    Все карточки страницы читаются из кэша одним get_many, недостающие
+    рендерятся и сохраняются одним set_many.
+    """
+    posts = list(posts)
+    if not posts:
+        return
+    cache = get_cache()
+    catalog_version, = get_versions(['catalog'])
+    keys = {
+        post.pk: CARD_KEY.format(
+            post.pk,
+            post.updated_at.timestamp(),
+            post.comment_count,
+            catalog_version
+        )
+        for post in posts
+    }
+    cached = cache.get_many(keys.values())
+    rendered = {}
+    for post in posts:
+        key = keys[post.pk]
+        html = cached.get(key)
+        if html is None:
+            html = rendered[key] = render_to_string(
+                CARD_TEMPLATE, {'post': post}
+            )
+        post.card_html = mark_safe(html)
+    if rendered:
+        cache.set_many(rendered, settings.BLOG_CARD_CACHE_TIMEOUT)
@@ -0,0 +1,111 @@
+"""Снимок категорий и мест в памяти процесса.
+
+Таблицы маленькие и меняются редко, а нужны почти каждой странице:
+категория ленты, подписи в карточках и на странице публикации. Снимок
+перечитывается, только когда меняется версия группы кэша 'catalog' —
+её увеличивают сигналы Category и Location (см. blog/signals.py),
+или когда снимок старше BLOG_CATALOG_MAX_AGE. Версия видна другим
+процессам только через общий кэш (CACHE_BACKEND); с locmem правки из
+соседнего воркера доходят до снимка не позже чем через
+BLOG_CATALOG_MAX_AGE секунд.
+
+Объекты снимка общие для всех потоков процесса: их можно только
+читать.
+"""
+import threading
+import time
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+
+from .cache import get_versions
+from .models import Category, Location, Post
+
+_catalog = None
+_lock = threading.Lock()
+
+
+class Catalog(NamedTuple):
+    version: int
+    loaded_at: float
+    categories: Mapping[int, Category]
+    # Только опубликованные: по слагу ищет лента категории
+    published_slugs: Mapping[str, Category]
+    locations: Mapping[int, Location]
+
+
+def load_catalog(version):
+    # Из основной базы: отставшая реплика не должна попасть в снимок
+    # под новой версией
+    categories = {
+        category.pk: category
+        for category in Category.objects.using('default')
+    }
+    return Catalog(
+        version=version,
+        loaded_at=time.monotonic(),
+        categories=MappingProxyType(categories),
+        published_slugs=MappingProxyType({
+            category.slug: category
+            for category in categories.values() if category.is_published
+        }),
+        locations=MappingProxyType({
+            location.pk: location
+            for location in Location.objects.using('default')
+        }),
+    )
+
+
+def is_fresh(catalog, version):
+    return (
+        catalog is not None and catalog.version == version
+        and time.monotonic() - catalog.loaded_at
+        < settings.BLOG_CATALOG_MAX_AGE
+    )
+
+
+def get_catalog():
+    global _catalog
+    version, = get_versions(['catalog'])
+    catalog = _catalog
+    if is_fresh(catalog, version):
+        return catalog
+    with _lock:
+        if not is_fresh(_catalog, version):
+            _catalog = load_catalog(version)
+        return _catalog
+
+
+def clear_catalog():
+    global _catalog
+    _catalog = None
+
+
+def get_published_category(slug):
+    category = get_catalog().published_slugs.get(slug)
+    if category is None:
+        # Снимок мог не застать категорию, добавленную в обход сигналов
+        category = get_object_or_404(
+            Category.objects.filter(is_published=True), slug=slug
+        )
+    return category
+
+
+def attach_catalog(posts):
+    """Подставляет публикациям категорию и место из снимка.
+
+    Заменяет select_related('category', 'location'): в шаблонах
+    post.category и post.location не вызывают запросов.
+    """
+    catalog = get_catalog()
+    category_field = Post._meta.get_field('category')
+    location_field = Post._meta.get_field('location')
+    for post in posts:
+        category = catalog.categories.get(post.category_id)
+        if category is not None:
+            category_field.set_cached_value(post, category)
+        location = catalog.locations.get(post.location_id)
+        if location is not None:
+            location_field.set_cached_value(post, location)
@@ -0,0 +1,84 @@
+"""Настройка соединений с базой данных.
+
+Каждому новому соединению с SQLite выставляются PRAGMA из
+настройки SQLITE_PRAGMAS (WAL, synchronous=NORMAL, mmap и т. п.):
+читатели перестают блокировать запись, а запись — чтение.
+
+Django 3.2 не умеет CONN_HEALTH_CHECKS (появились в 4.1), поэтому для
+постоянных соединений (CONN_MAX_AGE) проверка выполняется здесь, в
+начале каждого запроса к сайту.
+
+copy_database() обновляет локальные реплики для чтения (blog.routers).
+"""
+import re
+import sqlite3
+from contextlib import closing
+
+import django
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+PRAGMA_VALUE = re.compile(r'-?\w+')
+# busy_timeout — первым: смена journal_mode сама ждёт блокировку
+PRAGMA_ORDER = ('busy_timeout', 'journal_mode')
+
+
+def pragma_statements(pragmas):
+    names = sorted(pragmas, key=lambda name: (
+        PRAGMA_ORDER.index(name) if name in PRAGMA_ORDER
+        else len(PRAGMA_ORDER)
+    ))
+    for name in names:
+        value = str(pragmas[name])
+        if not name.isidentifier() or not PRAGMA_VALUE.fullmatch(value):
+            raise ValueError(f'Invalid SQLite pragma: {name}={value!r}.')
+        yield f'PRAGMA {name} = {value}'
+
+
+def apply_pragmas(cursor, pragmas):
+    # Принимает курсор DB-API: используется и бенчмарком без Django
+    for statement in pragma_statements(pragmas):
+        cursor.execute(statement)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    # Курсор драйвера: PRAGMA не попадают в журнал и счётчики запросов
+    cursor = connection.connection.cursor()
+    try:
+        apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
+    finally:
+        cursor.close()
+
+
+@receiver(request_started)
+def check_connections(**kwargs):
+    if django.VERSION >= (4, 1):
+        return
+    for connection in connections.all():
+        if (
+            connection.connection is not None
+            and connection.settings_dict.get('CONN_HEALTH_CHECKS')
+            and connection.close_at is not None
+            and not connection.is_usable()
+        ):
+            # Следующий запрос к БД откроет новое соединение
+            connection.close()
+
+
+def copy_database(source, target, timeout=5.0):
+    """Копирует файл SQLite source в target без остановки записи.
+
+    Backup API копирует все страницы за один шаг, под блокировкой
+    чтения source: реплика получает согласованный снимок. Файл target
+    обновляется на месте, поэтому открытые соединения с репликой
+    сразу видят новые данные.
+    """
+    with closing(sqlite3.connect(source, timeout=timeout)) as primary, \
+            closing(sqlite3.connect(target, timeout=timeout)) as replica:
+        primary.backup(replica)
@@ -0,0 +1,101 @@
+import csv
+import datetime
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Comment, Post
+
+# Выгружаемые наборы: модель и поля .values()
+DATASETS = {
+    'posts': (Post, (
+        'id', 'title', 'text', 'pub_date', 'created_at', 'updated_at',
+        'is_published', 'is_visible', 'author_id', 'category_id',
+        'location_id', 'comment_count',
+    )),
+    'comments': (Comment, (
+        'id', 'post_id', 'author_id', 'text', 'created_at', 'updated_at',
+    )),
+}
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {'jsonl': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+class Echo:
+    # csv.writer пишет в «файл», который просто возвращает строку
+    def write(self, value):
+        return value
+
+
+def parse_since(value):
+    """Разбирает --since/?since=: дата или дата и время (ISO 8601)."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Invalid timestamp: {value!r}.')
+        moment = datetime.datetime.combine(day, datetime.time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def export_queryset(dataset, since=None):
+    """Строки набора по возрастанию (updated_at, id).
+
+    С since — только изменённые с этого момента: updated_at меняют и
+    save(), и QuerySet.update() публикаций и комментариев, включая
+    пересчёты is_visible и comment_count. Удалённые строки в выгрузку
+    не попадают; их находят сравнением полных выгрузок.
+    """
+    model, fields = DATASETS[dataset]
+    queryset = model.objects.all()
+    if since is not None:
+        queryset = queryset.filter(updated_at__gte=since)
+    # Порядок совпадает с индексом (updated_at, id): без сортировки в БД
+    return queryset.order_by('updated_at', 'id').values_list(*fields)
+
+
+def format_lines(dataset, rows, export_format):
+    fields = DATASETS[dataset][1]
+    if export_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow(row)
+        return
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(fields, row))) + '\n'
+
+
+def stream_export(dataset, export_format='jsonl', since=None,
+                  chunk_size=2000, compress=False):
+    """Отдаёт выгрузку кусками байтов, по куску на chunk_size строк.
+
+    Строки читаются через iterator(chunk_size), поэтому в памяти
+    одновременно не больше одного куска выгрузки.
+    """
+    rows = export_queryset(dataset, since).iterator(chunk_size=chunk_size)
+    # wbits=31 — формат gzip
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    lines = []
+    for line in format_lines(dataset, rows, export_format):
+        lines.append(line)
+        if len(lines) >= chunk_size:
+            data = ''.join(lines).encode()
+            lines = []
+            yield compressor.compress(data) if compressor else data
+    data = ''.join(lines).encode()
+    if compressor:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
+
+
+def export_filename(dataset, export_format, compress):
+    stamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+    suffix = '.gz' if compress else ''
+    return f'{dataset}-{stamp}.{export_format}{suffix}'
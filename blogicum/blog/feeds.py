@@ -0,0 +1,126 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from .cache import cache_anonymous_page, conditional_page
+from .catalog import attach_catalog
+from .models import Category, Post
+
+# Ленты читают программы-агрегаторы, поэтому в них только опубликованное,
+# как в профиле автора для остальных читателей
+
+
+class PostsFeed(Feed):
+    title = 'Блогикум'
+    description = 'Новые публикации Блогикума'
+
+    def link(self):
+        return reverse('blog:index')
+
+    def get_posts(self, obj):
+        return Post.objects.published()
+
+    def items(self, obj):
+        posts = list(self.get_posts(obj).select_related(
+            'author'
+        ).order_by(*Post._meta.ordering, '-id')[:settings.BLOG_FEED_ITEMS])
+        attach_catalog(posts)
+        return posts
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return Truncator(item.text).words(60)
+
+    def item_link(self, item):
+        return reverse('blog:post_detail', args=(item.pk,))
+
+    def item_author_name(self, item):
+        return item.author.username
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_categories(self, item):
+        return (item.category.title,)
+
+
+class CategoryPostsFeed(PostsFeed):
+
+    def get_object(self, request, category_slug):
+        return get_object_or_404(
+            Category.objects.filter(is_published=True), slug=category_slug
+        )
+
+    def title(self, obj):
+        return f'Блогикум: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('blog:category_posts', args=(obj.slug,))
+
+    def get_posts(self, obj):
+        return Post.objects.published().filter(category=obj)
+
+
+class ProfilePostsFeed(PostsFeed):
+
+    def get_object(self, request, username):
+        return get_object_or_404(get_user_model(), username=username)
+
+    def title(self, obj):
+        return f'Блогикум: @{obj.username}'
+
+    def description(self, obj):
+        return f'Публикации пользователя {obj.username}'
+
+    def link(self, obj):
+        return reverse('blog:profile', args=(obj.username,))
+
+    def get_posts(self, obj):
+        return Post.objects.published().filter(author=obj)
+
+
+class AtomMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr('description', obj)
+
+
+class PostsAtomFeed(AtomMixin, PostsFeed):
+    pass
+
+
+class CategoryPostsAtomFeed(AtomMixin, CategoryPostsFeed):
+    pass
+
+
+class ProfilePostsAtomFeed(AtomMixin, ProfilePostsFeed):
+    pass
+
+
+def cached_feed(feed, group):
+    # XML ленты кэшируется и сбрасывается вместе со страницами той же
+    # группы, повторные опросы агрегаторов получают 304
+    return conditional_page(group)(cache_anonymous_page(group)(feed))
+
+
+posts_rss = cached_feed(PostsFeed(), 'index')
+posts_atom = cached_feed(PostsAtomFeed(), 'index')
+category_rss = cached_feed(CategoryPostsFeed(), 'category:{category_slug}')
+category_atom = cached_feed(
+    CategoryPostsAtomFeed(), 'category:{category_slug}'
+)
+profile_rss = cached_feed(ProfilePostsFeed(), 'profile:{username}')
+profile_atom = cached_feed(ProfilePostsAtomFeed(), 'profile:{username}')
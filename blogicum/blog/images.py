@@ -0,0 +1,139 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .cache import invalidate_post_id
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVES_DIR = 'images/derivatives'
+# Формат Pillow и расширение файла для каждого варианта
+FORMATS = (('JPEG', 'jpg'), ('WEBP', 'webp'))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.POST_IMAGE_WORKERS,
+                thread_name_prefix='post-images'
+            )
+    return _executor
+
+
+def needs_derivatives(post):
+    return bool(post.image) and (
+        post.image_variants.get('source') != post.image.name
+    )
+
+
+def variant_files(variants):
+    return [
+        variant[extension]
+        for name, variant in variants.items() if name != 'source'
+        for _, extension in FORMATS if extension in variant
+    ]
+
+
+def delete_files(names):
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except OSError:
+            logger.warning('Cannot delete image derivative %s', name)
+
+
+def discard_derivatives(post):
+    # Копии удалённой публикации или снятой картинки; файлы удаляются
+    # только после коммита, чтобы откат не оставил ссылок на них
+    names = variant_files(post.image_variants)
+    if names:
+        transaction.on_commit(lambda: delete_files(names))
+
+
+def schedule_derivatives(post):
+    # Рендер уменьшенных копий не задерживает ответ: задача уходит
+    # в пул потоков после коммита, до этого шаблоны отдают оригинал
+    if not post.image and post.image_variants:
+        Post.objects.filter(pk=post.pk, image='').update(image_variants={})
+        discard_derivatives(post)
+        post.image_variants = {}
+    if not needs_derivatives(post):
+        return
+    post_id, image_name = post.pk, post.image.name
+    transaction.on_commit(
+        lambda: get_executor().submit(run_in_worker, post_id, image_name)
+    )
+
+
+def run_in_worker(post_id, image_name):
+    try:
+        build_derivatives(post_id, image_name)
+    except Exception:
+        logger.exception('Cannot build derivatives for post %s', post_id)
+    finally:
+        close_old_connections()
+
+
+def render_variant(image, width, image_format):
+    variant = image.copy()
+    variant.thumbnail((width, width * 4))
+    if image_format == 'JPEG' and variant.mode != 'RGB':
+        variant = variant.convert('RGB')
+    buffer = BytesIO()
+    variant.save(
+        buffer, image_format, quality=settings.POST_IMAGE_QUALITY
+    )
+    return variant.width, buffer.getvalue()
+
+
+def build_derivatives(post_id, image_name):
+    with default_storage.open(image_name) as image_file:
+        image = Image.open(image_file)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    variants = {'source': image_name}
+    for size, width in settings.POST_IMAGE_SIZES.items():
+        variant = {}
+        for image_format, extension in FORMATS:
+            variant['width'], content = render_variant(
+                image, width, image_format
+            )
+            variant[extension] = default_storage.save(
+                f'{DERIVATIVES_DIR}/{stem}_{size}.{extension}',
+                ContentFile(content)
+            )
+        variants[size] = variant
+    stale = Post.objects.filter(pk=post_id).values_list(
+        'image_variants', flat=True
+    ).first() or {}
+    # Если картинку успели заменить, результат уже не нужен
+    updated = Post.objects.filter(pk=post_id, image=image_name).update(
+        image_variants=variants,
+        updated_at=timezone.now()
+    )
+    if updated:
+        invalidate_post_id(post_id)
+    else:
+        stale = variants
+    # Копии прежней картинки или ненужный результат
+    fresh = set(variant_files(variants)) if updated else set()
+    delete_files(
+        name for name in variant_files(stale) if name not in fresh
+    )
+    return variants
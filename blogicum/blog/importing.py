@@ -0,0 +1,248 @@
+import json
+
+from django.apps import apps
+from django.core.serializers.python import Deserializer
+from django.db import models, transaction
+from django.utils import timezone
+
+from .models import Comment, Post, actual_comment_count
+from .search import index_posts
+from .stats import refresh_author_stats
+from .text import render_text_fields
+
+# Модели, которые импортирует команда import_fixture по умолчанию
+DEFAULT_MODELS = (
+    'blog.category', 'blog.location', 'blog.post', 'blog.comment'
+)
+READ_SIZE = 1 << 16
+# Больше символов на один объект не читается: битый объект иначе
+# дочитывался бы до конца файла
+MAX_OBJECT_SIZE = 1 << 24
+WHITESPACE = ' \t\n\r'
+SEPARATORS = WHITESPACE + ','
+
+
+class FixtureError(ValueError):
+    pass
+
+
+def skip_separators(buffer, position):
+    while position < len(buffer) and buffer[position] in SEPARATORS:
+        position += 1
+    return position
+
+
+def read_array_start(stream, read_size):
+    # Возвращает остаток буфера после '[' и число символов до него
+    buffer, read = '', 0
+    while True:
+        chunk = stream.read(read_size)
+        if not chunk:
+            raise FixtureError('Fixture is empty.')
+        read += len(chunk)
+        buffer = (buffer + chunk).lstrip(WHITESPACE)
+        if buffer:
+            break
+    if buffer[0] != '[':
+        raise FixtureError('Fixture must be a JSON array.')
+    return buffer[1:], read - len(buffer) + 1
+
+
+def iter_fixture(stream, read_size=READ_SIZE,
+                 max_object_size=MAX_OBJECT_SIZE):
+    """Потоково разбирает фикстуру формата dumpdata: [{...}, {...}].
+
+    В памяти одновременно только буфер чтения и текущий объект (не
+    больше max_object_size символов), поэтому расход памяти не зависит
+    от размера файла.
+    """
+    decoder = json.JSONDecoder()
+    # offset — символов файла перед началом буфера, для сообщений
+    buffer, offset = read_array_start(stream, read_size)
+    position, eof = 0, False
+    while True:
+        position = skip_separators(buffer, position)
+        if position < len(buffer):
+            if buffer[position] == ']':
+                return
+            try:
+                obj, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as error:
+                # Объект не дочитан: подгружаем ещё
+                if eof:
+                    raise FixtureError(
+                        f'Fixture is truncated or malformed at character '
+                        f'{offset + error.pos}: {error.msg}.'
+                    )
+                if len(buffer) - position > max_object_size:
+                    raise FixtureError(
+                        f'Object at character {offset + position} is '
+                        f'malformed or longer than {max_object_size} '
+                        'characters.'
+                    )
+            else:
+                yield obj
+                continue
+        elif eof:
+            raise FixtureError('Fixture is truncated.')
+        chunk = stream.read(read_size)
+        eof = not chunk
+        offset += position
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def dependency_order(labels):
+    # Модель идёт после тех, на кого ссылается (внутри выбранного набора)
+    selected = {apps.get_model(label): label for label in labels}
+    ordered = []
+
+    def visit(model, path=()):
+        if selected[model] in ordered:
+            return
+        if model in path:
+            raise FixtureError(f'Circular dependency: {selected[model]}.')
+        for field in model._meta.get_fields():
+            related = getattr(field, 'related_model', None)
+            if field.many_to_one and related in selected and related != model:
+                visit(related, path + (model,))
+        ordered.append(selected[model])
+
+    for model in selected:
+        visit(model)
+    return ordered
+
+
+def timestamp_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if isinstance(field, models.DateField)
+        and (field.auto_now or field.auto_now_add)
+    ]
+
+
+def insert_objects(model, instances, using):
+    """Вставляет объекты с датами из фикстуры, как loaddata.
+
+    bulk_create вызывает pre_save() полей, и auto_now/auto_now_add
+    подставляют текущее время, поэтому даты из фикстуры возвращаются
+    вторым запросом, bulk_update. Объектам без pk (SQLite не возвращает
+    их из bulk_create) остаётся время вставки. Пустые даты заполняются
+    текущим временем, текст для шаблонов — как в save().
+    """
+    now = timezone.now()
+    dates = timestamp_fields(model)
+    for instance in instances:
+        for field in dates:
+            if getattr(instance, field.attname) is None:
+                setattr(instance, field.attname, now)
+        render_text_fields(instance)
+    # pre_save() меняет сами объекты: даты запоминаются до вставки
+    stamps = [
+        [getattr(instance, field.attname) for field in dates]
+        for instance in instances
+    ]
+    manager = model._base_manager.using(using)
+    manager.bulk_create(instances)
+    restored = []
+    for instance, values in zip(instances, stamps):
+        if instance.pk is None:
+            continue
+        for field, value in zip(dates, values):
+            setattr(instance, field.attname, value)
+        restored.append(instance)
+    if dates and restored:
+        manager.bulk_update(restored, [field.name for field in dates])
+
+
+def check_references(model, instances, using):
+    # Без этой проверки пропущенный автор или категория дают только
+    # «FOREIGN KEY constraint failed» без подробностей
+    label = model._meta.label_lower
+    for field in model._meta.concrete_fields:
+        if not field.many_to_one:
+            continue
+        values = {getattr(instance, field.attname) for instance in instances}
+        values.discard(None)
+        if not values:
+            continue
+        target = field.target_field.attname
+        found = set(field.related_model._base_manager.using(using).filter(
+            **{f'{target}__in': values}
+        ).values_list(target, flat=True))
+        missing = sorted(values - found)
+        if missing:
+            shown = ', '.join(str(value) for value in missing[:20])
+            raise FixtureError(
+                f'{label}.{field.name} refers to {len(missing)} missing '
+                f'{field.related_model._meta.label_lower} objects '
+                f'({shown}); load them first.'
+            )
+
+
+def after_insert(model, instances, using):
+    # bulk_create не вызывает save() и сигналы: досчитываем то, что
+    # обычно делают они
+    if model is Post:
+        posts = Post.objects.using(using).filter(
+            pk__in=[post.pk for post in instances]
+        )
+        # Комментарии могли загрузиться раньше публикации; updated_at
+        # остаётся из фикстуры
+        posts.update(
+            comment_count=actual_comment_count(),
+            updated_at=models.F('updated_at')
+        )
+        posts.sync_visibility(touch=False)
+        index_posts(instances, using)
+    elif model is Comment:
+        # Пересчёт, а не прибавление: счётчик мог прийти из фикстуры
+        posts = Post.objects.using(using).filter(
+            pk__in={comment.post_id for comment in instances}
+        )
+        posts.update(comment_count=actual_comment_count())
+        refresh_author_stats({
+            *(comment.author_id for comment in instances),
+            *posts.values_list('author_id', flat=True),
+        }, using)
+
+
+def insert_batch(model, batch, using):
+    instances = [
+        deserialized.object
+        for deserialized in Deserializer(
+            batch, using=using, ignorenonexistent=True
+        )
+    ]
+    for instance in instances:
+        if instance.pk is None:
+            raise FixtureError(
+                f'Object of {model._meta.label_lower} has no pk.'
+            )
+    check_references(model, instances, using)
+    with transaction.atomic(using=using):
+        insert_objects(model, instances, using)
+        after_insert(model, instances, using)
+    return len(instances)
+
+
+def import_model(path, label, batch_size, using='default'):
+    """Вставляет объекты одной модели пачками, по транзакции на пачку.
+
+    Генератор: после каждой пачки отдаёт число вставленных строк.
+    """
+    model = apps.get_model(label)
+    imported = 0
+    with open(path, encoding='utf-8') as stream:
+        batch = []
+        for obj in iter_fixture(stream):
+            if obj.get('model', '').lower() != label:
+                continue
+            batch.append(obj)
+            if len(batch) == batch_size:
+                imported += insert_batch(model, batch, using)
+                batch = []
+                yield imported
+        if batch:
+            imported += insert_batch(model, batch, using)
+            yield imported
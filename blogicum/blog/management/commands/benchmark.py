@@ -0,0 +1,116 @@
+import json
+import platform
+import sys
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from blog.benchmark import (
+    build_scenarios, compare_feed_rows, run_scenarios, seed_dataset
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет временную базу синтетическими данными и замеряет '
+        'p50/p95/p99, число запросов и размер ответов страниц блога. '
+        'Результат — JSON для сравнения прогонов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', type=int, default=1000,
+            help='Количество публикаций (10^3–10^6).'
+        )
+        parser.add_argument(
+            '--comments-per-post', type=int, default=5,
+            help='Среднее число комментариев на публикацию.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=50,
+            help='Замеров на сценарий.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Прогревочных запросов без замера.'
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--no-page-cache', action='store_true',
+            help='Отключить кэш страниц для анонимов.'
+        )
+        parser.add_argument(
+            '-o', '--output',
+            help='Файл для JSON; по умолчанию стандартный вывод.'
+        )
+
+    def handle(self, *args, **options):
+        if options['posts'] < 1 or options['repeat'] < 2:
+            raise CommandError(
+                '--posts must be positive and --repeat at least 2.'
+            )
+        # Рабочая база не трогается: данные живут во временной тестовой
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            report = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        data = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                stream.write(data + '\n')
+        else:
+            self.stdout.write(data)
+
+    def run(self, options):
+        started = time.monotonic()
+        seed_dataset(
+            options['posts'], options['comments_per_post'], options['seed'],
+            log=self.stderr.write
+        )
+        seeded = time.monotonic() - started
+        self.stderr.write(f'Данные созданы за {seeded:.1f} с')
+        results = run_scenarios(
+            build_scenarios(settings.POSTS_PER_PAGE),
+            options['repeat'], options['warmup'],
+            page_cache=not options['no_page_cache']
+        )
+        for result in results:
+            self.stderr.write(
+                '{name:<22} {user:<14} p50 {p50_ms:>8} p95 {p95_ms:>8} '
+                'p99 {p99_ms:>8} мс, запросов {queries}, '
+                'байт {bytes}, коды {status}'.format(**result)
+            )
+        read_models = compare_feed_rows(
+            settings.POSTS_PER_PAGE, options['repeat']
+        )
+        for name, stats in read_models.items():
+            self.stderr.write(
+                'Страница ленты из {name}: {retained_kib} КиБ, пик '
+                '{peak_kib} КиБ, {cpu_ms} мс CPU'.format(name=name, **stats)
+            )
+        return {
+            'meta': {
+                'posts': options['posts'],
+                'comments_per_post': options['comments_per_post'],
+                'seed': options['seed'],
+                'repeat': options['repeat'],
+                'warmup': options['warmup'],
+                'page_cache': not options['no_page_cache'],
+                'seed_seconds': round(seeded, 1),
+                'created_at': timezone.now().isoformat(),
+                'python': sys.version.split()[0],
+                'django': django.get_version(),
+                'platform': platform.platform(),
+                'database': connection.vendor,
+            },
+            'results': results,
+            'read_models': read_models,
+        }
@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.benchmark import sqlite_contention
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает работу SQLite под одновременными чтением и записью '
+        'с настройками по умолчанию и с SQLITE_PRAGMAS. Результат — JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument(
+            '--seconds', type=float, default=5,
+            help='Длительность прогона каждой конфигурации, с.'
+        )
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument(
+            '-o', '--output',
+            help='Файл для JSON; по умолчанию стандартный вывод.'
+        )
+
+    def handle(self, *args, **options):
+        if options['readers'] < 0 or options['writers'] < 1:
+            raise CommandError('At least one writer is required.')
+        configs = {'default': {}, 'tuned': settings.SQLITE_PRAGMAS}
+        results = {}
+        for name, pragmas in configs.items():
+            with tempfile.TemporaryDirectory() as root:
+                results[name] = sqlite_contention(
+                    os.path.join(root, 'bench.sqlite3'), pragmas,
+                    readers=options['readers'],
+                    writers=options['writers'],
+                    seconds=options['seconds'],
+                    posts=options['posts'],
+                    timeout=settings.SQLITE_BUSY_TIMEOUT,
+                )
+            for role, stats in results[name].items():
+                self.stderr.write(
+                    f'{name:<8} {role:<6} {stats["ops_per_second"]:>9} '
+                    f'оп/с, p95 {stats.get("p95_ms")} мс, '
+                    f'ошибок {stats["errors"]}'
+                )
+        report = {
+            'meta': {
+                key: options[key]
+                for key in ('readers', 'writers', 'seconds', 'posts')
+            },
+            'pragmas': settings.SQLITE_PRAGMAS,
+            'results': results,
+        }
+        data = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                stream.write(data + '\n')
+        else:
+            self.stdout.write(data)
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.images import build_derivatives, needs_derivatives
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные копии фото публикаций, у которых их нет.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько публикаций читать за один запрос.'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive.')
+        built = 0
+        last_pk = 0
+        while True:
+            posts = list(
+                Post.objects.filter(pk__gt=last_pk).exclude(
+                    image=''
+                ).order_by('pk').only('image', 'image_variants')[:batch_size]
+            )
+            if not posts:
+                break
+            last_pk = posts[-1].pk
+            for post in filter(needs_derivatives, posts):
+                try:
+                    build_derivatives(post.pk, post.image.name)
+                except OSError as error:
+                    self.stderr.write(f'Публикация {post.pk}: {error}')
+                    continue
+                built += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: обработано публикаций {built}.'
+        ))
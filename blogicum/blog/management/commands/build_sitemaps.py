@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.sitemaps import build_sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Обновляет файлы карты сайта (индекс и разделы публикаций, '
+        'категорий и профилей); неизменившиеся файлы не перезаписываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--shard-size', type=int, default=settings.SITEMAP_SHARD_SIZE,
+            help='Диапазон первичных ключей на один файл.'
+        )
+        parser.add_argument(
+            '--base-url', default=settings.SITEMAP_BASE_URL,
+            help='Адрес сайта для ссылок.'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Перезаписать все файлы.'
+        )
+
+    def handle(self, *args, shard_size, base_url, force, **options):
+        if shard_size < 1:
+            raise CommandError('--shard-size must be positive.')
+        total = written = 0
+        for filename, changed in build_sitemaps(
+            settings.SITEMAP_ROOT, base_url, shard_size, force
+        ):
+            total += 1
+            written += changed
+            if changed:
+                self.stdout.write(f'Обновлён {filename}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: файлов {total}, обновлено {written}.'
+        ))
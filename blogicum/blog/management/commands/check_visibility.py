@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from blog.cache import invalidate_posts
+from blog.models import Post, visibility_case
+
+
+class Command(BaseCommand):
+    help = 'Проверяет и исправляет денормализованное поле Post.is_visible.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество публикаций в одной транзакции.'
+        )
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Исправить найденные расхождения.'
+        )
+
+    def handle(self, *args, batch_size, fix, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive.')
+        now = timezone.now()
+        checked = drifted = 0
+        last_pk = 0
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    Post.objects.filter(
+                        pk__gt=last_pk
+                    ).order_by('pk').annotate(
+                        expected=visibility_case(now)
+                    ).values_list(
+                        'pk', 'is_visible', 'expected'
+                    )[:batch_size]
+                )
+                if not rows:
+                    break
+                last_pk = rows[-1][0]
+                wrong = [
+                    pk for pk, stored, expected in rows if stored != expected
+                ]
+                if wrong and fix:
+                    posts = Post.objects.filter(pk__in=wrong)
+                    posts.sync_visibility(now)
+                    invalidate_posts(posts.only('category_id', 'author_id'))
+            checked += len(rows)
+            drifted += len(wrong)
+            self.stdout.write(
+                f'Проверено публикаций: {checked}, расхождений: {drifted}'
+            )
+        if drifted and not fix:
+            raise CommandError(
+                f'Visibility drifted for {drifted} posts, run with --fix.'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: проверено {checked}, '
+            f'{"исправлено" if fix else "найдено"} {drifted}.'
+        ))
@@ -0,0 +1,63 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.exporting import DATASETS, FORMATS, parse_since, stream_export
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает публикации или комментарии в JSONL или CSV '
+        '(по желанию со сжатием gzip).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=DATASETS)
+        parser.add_argument(
+            '--format', choices=FORMATS, default='jsonl',
+            dest='export_format', help='Формат выгрузки.'
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжать выгрузку gzip.'
+        )
+        parser.add_argument(
+            '--since',
+            help=(
+                'Только строки, изменённые с этого момента (ISO 8601); '
+                'удаления не выгружаются.'
+            )
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из БД за раз.'
+        )
+        parser.add_argument(
+            '-o', '--output',
+            help='Файл для выгрузки; по умолчанию стандартный вывод.'
+        )
+
+    def handle(self, *args, dataset, export_format, gzip, since,
+               chunk_size, output, **options):
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be positive.')
+        if since is not None:
+            try:
+                since = parse_since(since)
+            except ValueError as error:
+                raise CommandError(error)
+        chunks = stream_export(
+            dataset, export_format, since, chunk_size, gzip
+        )
+        if output is None:
+            stream = sys.stdout.buffer
+            for chunk in chunks:
+                stream.write(chunk)
+            stream.flush()
+            return
+        written = 0
+        with open(output, 'wb') as stream:
+            for chunk in chunks:
+                written += stream.write(chunk)
+        self.stderr.write(self.style.SUCCESS(
+            f'Готово: {output}, {written} байт.'
+        ))
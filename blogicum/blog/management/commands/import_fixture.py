@@ -0,0 +1,86 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DatabaseError, connections
+
+from blog.cache import invalidate
+from blog.importing import (
+    DEFAULT_MODELS, FixtureError, dependency_order, import_model
+)
+
+
+def rate(rows, started):
+    elapsed = time.monotonic() - started
+    return round(rows / elapsed) if elapsed else rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает большую фикстуру формата dumpdata (JSON) '
+        'через bulk_create, не читая файл в память целиком.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixture', help='Путь к JSON-фикстуре.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество объектов в одной транзакции.'
+        )
+        parser.add_argument(
+            '--models', nargs='+', default=DEFAULT_MODELS,
+            help='Модели для загрузки (app_label.model).'
+        )
+        parser.add_argument(
+            '--database', default='default',
+            help='Псевдоним базы данных.'
+        )
+
+    def handle(self, *args, fixture, batch_size, models, database,
+               **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive.')
+        try:
+            labels = dependency_order([label.lower() for label in models])
+        except (LookupError, FixtureError) as error:
+            raise CommandError(error)
+        total = 0
+        started = time.monotonic()
+        # По проходу файла на модель: ссылки всегда указывают на уже
+        # загруженные строки, а файл не держится в памяти
+        for label in labels:
+            try:
+                total += self.import_label(
+                    fixture, label, batch_size, database
+                )
+            except (OSError, FixtureError, DatabaseError) as error:
+                raise CommandError(f'{label}: {error}')
+        self.reset_sequences(labels, database)
+        invalidate('catalog')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: загружено {total} за '
+            f'{time.monotonic() - started:.1f} с '
+            f'({rate(total, started)} строк/с). '
+            'Уменьшенные копии фото создаёт build_image_derivatives.'
+        ))
+
+    def import_label(self, fixture, label, batch_size, database):
+        started = time.monotonic()
+        imported = 0
+        for imported in import_model(fixture, label, batch_size, database):
+            self.stdout.write(
+                f'{label}: {imported} ({rate(imported, started)} строк/с)'
+            )
+        return imported
+
+    def reset_sequences(self, labels, database):
+        # Первичные ключи пришли из файла, счётчики нужно подвинуть
+        connection = connections[database]
+        sequence_sql = connection.ops.sequence_reset_sql(
+            no_style(), [apps.get_model(label) for label in labels]
+        )
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from blog.publishing import next_publication_time, publish_due_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Открывает отложенные публикации, дата которых наступила. '
+        'С --loop работает постоянно и просыпается к ближайшей дате.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно.'
+        )
+        parser.add_argument(
+            '--max-sleep', type=float, default=60,
+            help='Максимальная пауза между проверками, с.'
+        )
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Заполнить кэш затронутых страниц после публикации.'
+        )
+
+    def handle(self, *args, loop, max_sleep, warm, **options):
+        if max_sleep <= 0:
+            raise CommandError('--max-sleep must be positive.')
+        while True:
+            posts = publish_due_posts(warm=warm)
+            if posts:
+                self.stdout.write(
+                    f'Опубликовано: {", ".join(str(p.pk) for p in posts)}'
+                )
+            if not loop:
+                break
+            # Новые отложенные публикации замечаем не позже max_sleep
+            upcoming = next_publication_time()
+            delay = max_sleep
+            if upcoming is not None:
+                seconds = (upcoming - timezone.now()).total_seconds()
+                delay = min(max(seconds, 0), max_sleep)
+            time.sleep(delay)
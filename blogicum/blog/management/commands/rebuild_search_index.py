@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс публикаций (SQLite FTS5).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество публикаций в одной транзакции.'
+        )
+        parser.add_argument(
+            '--database', default='default',
+            help='Псевдоним базы данных.'
+        )
+
+    def handle(self, *args, batch_size, database, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive.')
+        indexed = 0
+        for indexed in rebuild_index(batch_size, database):
+            self.stdout.write(f'Проиндексировано публикаций: {indexed}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: проиндексировано {indexed}.'
+        ))
@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from blog.models import AuthorStats
+from blog.stats import COUNTERS, count_author_stats, refresh_batch
+
+
+def stored_values(author_ids):
+    return {
+        row[0]: row[1:]
+        for row in AuthorStats.objects.filter(
+            author__in=author_ids
+        ).values_list('author', *COUNTERS)
+    }
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает и проверяет статистику авторов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Количество авторов в одной транзакции.'
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только проверить счётчики, не исправляя их.'
+        )
+
+    def handle(self, *args, batch_size, check, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive.')
+        users = get_user_model().objects.order_by('pk')
+        checked = drifted = 0
+        last_pk = 0
+        while True:
+            # Идём по первичному ключу без OFFSET
+            with transaction.atomic():
+                author_ids = list(
+                    users.filter(pk__gt=last_pk).values_list(
+                        'pk', flat=True
+                    )[:batch_size]
+                )
+                if not author_ids:
+                    break
+                last_pk = author_ids[-1]
+                stored = stored_values(author_ids)
+                actual = count_author_stats(author_ids)
+                wrong = [
+                    pk for pk, item in actual.items()
+                    if stored.get(pk) != tuple(
+                        getattr(item, name) for name in COUNTERS
+                    )
+                ]
+                if wrong and not check:
+                    refresh_batch(wrong, 'default')
+            checked += len(author_ids)
+            drifted += len(wrong)
+            self.stdout.write(
+                f'Проверено авторов: {checked}, расхождений: {drifted}'
+            )
+        if check and drifted:
+            raise CommandError(
+                f'Author stats drifted for {drifted} authors.'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: проверено {checked}, '
+            f'{"найдено" if check else "исправлено"} {drifted}.'
+        ))
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from blog.models import Post, actual_comment_count
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает и проверяет счётчики комментариев публикаций.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество публикаций в одной транзакции.'
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только проверить счётчики, не исправляя их.'
+        )
+
+    def handle(self, *args, batch_size, check, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive.')
+        checked = drifted = 0
+        last_pk = 0
+        while True:
+            # Идём по первичному ключу без OFFSET
+            with transaction.atomic():
+                rows = list(
+                    Post.objects.filter(
+                        pk__gt=last_pk
+                    ).order_by('pk').annotate(
+                        actual=actual_comment_count()
+                    ).values_list(
+                        'pk', 'comment_count', 'actual'
+                    )[:batch_size]
+                )
+                if not rows:
+                    break
+                last_pk = rows[-1][0]
+                wrong = [pk for pk, stored, actual in rows if stored != actual]
+                if wrong and not check:
+                    Post.objects.filter(pk__in=wrong).update(
+                        comment_count=actual_comment_count()
+                    )
+            checked += len(rows)
+            drifted += len(wrong)
+            self.stdout.write(
+                f'Проверено публикаций: {checked}, расхождений: {drifted}'
+            )
+        if check and drifted:
+            raise CommandError(
+                f'Comment counters drifted for {drifted} posts.'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: проверено {checked}, '
+            f'{"найдено" if check else "исправлено"} {drifted}.'
+        ))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.cache import invalidate
+from blog.models import Comment, Post
+from blog.text import backfill_text_fields
+
+MODELS = {'posts': Post, 'comments': Comment}
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет готовый HTML и отрывки текста публикаций и '
+        'комментариев (text_html, excerpt).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество строк в одном UPDATE.'
+        )
+        parser.add_argument(
+            '--models', nargs='+', choices=MODELS, default=list(MODELS),
+            help='Какие модели обработать.'
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать все строки, а не только незаполненные.'
+        )
+
+    def handle(self, *args, batch_size, models, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive.')
+        total = 0
+        for name in models:
+            rendered = 0
+            for count in backfill_text_fields(
+                MODELS[name], batch_size, only_missing=not options['all']
+            ):
+                rendered += count
+                self.stdout.write(f'{name}: обработано {rendered}')
+            total += rendered
+        if total:
+            # bulk_update не отправляет сигналы: карточки и страницы
+            # в кэше могли остаться со старым текстом
+            invalidate('catalog')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: обработано {total}.'
+        ))
@@ -0,0 +1,53 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from blog.db import copy_database
+from blog.routers import mark_synced
+
+
+class Command(BaseCommand):
+    help = (
+        'Обновляет локальные реплики SQLite из DATABASE_REPLICAS копией '
+        'основной базы. С --loop повторяет это каждые '
+        'REPLICA_SYNC_INTERVAL секунд.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Обновлять реплики периодически, до остановки.'
+        )
+        parser.add_argument(
+            '--interval', type=float,
+            help='Период обновления, с; по умолчанию REPLICA_SYNC_INTERVAL.'
+        )
+
+    def handle(self, *args, **options):
+        primary = connections['default'].settings_dict
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Only SQLite replicas can be synced.')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('No replicas configured, set DB_REPLICAS.')
+        interval = options['interval'] or settings.REPLICA_SYNC_INTERVAL
+        while True:
+            started = time.monotonic()
+            for alias in settings.DATABASE_REPLICAS:
+                # Снимок содержит всё, что закоммичено до начала копии
+                synced = time.time()
+                copy_database(
+                    str(primary['NAME']),
+                    str(connections[alias].settings_dict['NAME']),
+                    timeout=settings.SQLITE_BUSY_TIMEOUT
+                )
+                mark_synced(alias, synced)
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'Обновлено реплик: {len(settings.DATABASE_REPLICAS)} '
+                f'за {elapsed:.2f} с'
+            )
+            if not options['loop']:
+                return
+            time.sleep(max(0, interval - elapsed))
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:40
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def sync_visibility(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Category = apps.get_model('blog', 'Category')
+    Post.objects.update(is_visible=models.Case(
+        models.When(
+            models.Q(
+                is_published=True,
+                pub_date__lte=timezone.now(),
+                category__in=Category.objects.filter(is_published=True)
+            ),
+            then=models.Value(True)
+        ),
+        default=models.Value(False),
+        output_field=models.BooleanField()
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_is_visible'),
+    ]
+
+    operations = [
+        migrations.RunPython(sync_visibility, migrations.RunPython.noop),
+    ]
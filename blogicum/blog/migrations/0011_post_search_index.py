@@ -0,0 +1,36 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:50
+
+from django.db import migrations
+
+CREATE_FTS_TABLE = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts '
+    "USING fts5(title, text, tokenize='unicode61')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    # Полнотекстовый индекс FTS5 есть только в SQLite
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_FTS_TABLE)
+    schema_editor.execute(
+        'INSERT INTO blog_post_fts (rowid, title, text) '
+        'SELECT id, title, text FROM blog_post'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS blog_post_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_post_visibility_category'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:47
+
+from django.db import migrations, models
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+# Копия blog.text на момент миграции: код приложения может измениться,
+# а миграция должна давать тот же результат
+EXCERPT_WORDS = 10
+
+
+def text_to_html(text):
+    return str(linebreaksbr(text, autoescape=True))
+
+
+def make_excerpt(text):
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
+
+def render_existing(apps, schema_editor):
+    # Шаблоны выводят готовые поля, поэтому старые строки заполняются сразу
+    for name, fields in (
+        ('Post', ('text_html', 'excerpt')),
+        ('Comment', ('text_html',)),
+    ):
+        model = apps.get_model('blog', name)
+        queryset = model.objects.only('pk', 'text').order_by('pk')
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:1000])
+            if not batch:
+                break
+            for instance in batch:
+                instance.text_html = text_to_html(instance.text)
+                if 'excerpt' in fields:
+                    instance.excerpt = make_excerpt(instance.text)
+            model.objects.bulk_update(batch, fields)
+            last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_export_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Текст в HTML'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Отрывок'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Текст в HTML'),
+        ),
+        migrations.RunPython(render_existing, migrations.RunPython.noop),
+    ]
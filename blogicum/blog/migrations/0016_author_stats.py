@@ -0,0 +1,76 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def group_counts(queryset, field, **extra):
+    return {
+        row[field]: row
+        for row in queryset.order_by().values(field).annotate(
+            total=models.Count('pk'), **extra
+        )
+    }
+
+
+def fill_author_stats(apps, schema_editor):
+    # Строки для уже существующих пользователей, чтобы профили не
+    # пересчитывали их при первом показе
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    AuthorStats = apps.get_model('blog', 'AuthorStats')
+    posts = group_counts(
+        Post.objects, 'author',
+        published=models.Count('pk', filter=models.Q(is_visible=True)),
+        last=models.Max('updated_at'),
+    )
+    received = group_counts(Comment.objects, 'post__author')
+    written = group_counts(
+        Comment.objects, 'author', last=models.Max('updated_at')
+    )
+    stats = []
+    for pk in User.objects.values_list('pk', flat=True).iterator():
+        post_row = posts.get(pk, {})
+        written_row = written.get(pk, {})
+        moments = [
+            moment for moment in (post_row.get('last'), written_row.get('last'))
+            if moment is not None
+        ]
+        stats.append(AuthorStats(
+            author_id=pk,
+            published_posts=post_row.get('published', 0),
+            total_posts=post_row.get('total', 0),
+            comments_received=received.get(pk, {}).get('total', 0),
+            comments_written=written_row.get('total', 0),
+            last_activity=max(moments) if moments else None,
+        ))
+    AuthorStats.objects.bulk_create(stats, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0015_rendered_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('published_posts', models.PositiveIntegerField(default=0, verbose_name='Видимых публикаций')),
+                ('total_posts', models.PositiveIntegerField(default=0, verbose_name='Всего публикаций')),
+                ('comments_received', models.PositiveIntegerField(default=0, verbose_name='Комментариев к публикациям')),
+                ('comments_written', models.PositiveIntegerField(default=0, verbose_name='Написано комментариев')),
+                ('last_activity', models.DateTimeField(blank=True, null=True, verbose_name='Последняя активность')),
+            ],
+            options={
+                'verbose_name': 'статистика автора',
+                'verbose_name_plural': 'Статистика авторов',
+            },
+        ),
+        migrations.RunPython(fill_author_stats, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,11 @@
 from django.db import models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .text import render_text_fields, with_rendered_fields
 
 
 User = get_user_model()
@@ -8,6 +14,24 @@ slug_help_text = 'Идентификатор страницы для URL; раз
                  'латиницы, цифры, дефис и подчёркивание.'
 pub_date_help = 'Если установить дату и время в будущем — можно делать ' + \
                 'отложенные публикации.'
+# Поля публикации, от которых зависит Post.is_visible
+VISIBILITY_FIELDS = {'is_published', 'pub_date', 'category', 'category_id'}
+# Производные поля: не выгружаются, а их пересчёт в update() не меняет
+# updated_at
+UNTRACKED_FIELDS = {'text_html', 'excerpt', 'image_variants'}
+
+
+def touches(kwargs):
+    """Нужно ли update(**kwargs) отметить изменение в updated_at.
+
+    Правки в обход save() должны менять ключ карточки и попадать в
+    выгрузку с --since. Кто передаёт updated_at сам, сам сбрасывает и
+    кэш страниц.
+    """
+    return (
+        'updated_at' not in kwargs
+        and bool(kwargs.keys() - UNTRACKED_FIELDS)
+    )
 
 
 class Location(models.Model):
@@ -27,6 +51,21 @@ class Location(models.Model):
         return self.name
 
 
+class CategoryQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        if 'is_published' not in kwargs:
+            return super().update(**kwargs)
+        # Сигналы при update() не отправляются, поэтому видимость
+        # публикаций пересчитываем здесь же
+        pks = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        Post.objects.filter(category__in=pks).sync_visibility()
+        from .cache import invalidate
+        invalidate('catalog')
+        return rows
+
+
 class Category(models.Model):
     title = models.CharField('Заголовок', max_length=256)
     description = models.TextField('Описание')
@@ -42,6 +81,8 @@ class Category(models.Model):
     )
     created_at = models.DateTimeField('Добавлено', auto_now_add=True)
 
+    objects = CategoryQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'категория'
         verbose_name_plural = 'Категории'
@@ -50,6 +91,78 @@ class Category(models.Model):
         return self.title
 
 
+def visibility_case(now=None):
+    # Значение Post.is_visible для пересчёта одним UPDATE, без JOIN
+    return models.Case(
+        models.When(
+            models.Q(
+                is_published=True,
+                pub_date__lte=now or timezone.now(),
+                category__in=Category.objects.filter(is_published=True)
+            ),
+            then=models.Value(True)
+        ),
+        default=models.Value(False),
+        output_field=models.BooleanField()
+    )
+
+
+class PostQuerySet(models.QuerySet):
+
+    def published(self):
+        # Правила видимости публикации для читателей
+        return self.filter(is_visible=True)
+
+    def visible_to(self, user):
+        # Автор видит свои публикации всегда, остальные — только видимые
+        if not user.is_authenticated:
+            return self.published()
+        return self.filter(models.Q(is_visible=True) | models.Q(author=user))
+
+    def sync_visibility(self, now=None, touch=True):
+        """Пересчитывает is_visible одним UPDATE.
+
+        Меняются только строки, у которых видимость другая; touch
+        отмечает это в updated_at (для выгрузки с --since). Только что
+        загруженным строкам отметка не нужна.
+        """
+        from .stats import refresh_author_stats
+        now = now or timezone.now()
+        visible = visibility_case(now)
+        # Число видимых публикаций авторов меняется вместе с видимостью
+        authors = set(self.values_list('author_id', flat=True))
+        rows = self.exclude(is_visible=visible).update(
+            is_visible=visible,
+            updated_at=now if touch else models.F('updated_at')
+        )
+        refresh_author_stats(authors, self.db)
+        return rows
+
+    def update(self, **kwargs):
+        kwargs = with_rendered_fields(self.model, kwargs)
+        touch = touches(kwargs)
+        if not touch and not VISIBILITY_FIELDS & kwargs.keys():
+            return super().update(**kwargs)
+        if touch:
+            kwargs['updated_at'] = timezone.now()
+        # Прежние категории и авторы: их страницы тоже меняются
+        rows = list(self.values_list('pk', 'category_id', 'author_id'))
+        updated = super().update(**kwargs)
+        posts = self.model.objects.filter(pk__in=[row[0] for row in rows])
+        if VISIBILITY_FIELDS & kwargs.keys():
+            posts.sync_visibility()
+        if {'title', 'text'} & kwargs.keys():
+            from .search import index_posts
+            index_posts(posts.only('title', 'text'), self.db)
+        from .cache import invalidate_posts
+        invalidate_posts(
+            posts.only('category_id', 'author_id'),
+            category_ids={row[1] for row in rows},
+            user_ids={row[2] for row in rows}
+        )
+        return updated
+
+
 class Post(models.Model):
     title = models.CharField('Заголовок', max_length=256)
     text = models.TextField('Текст')
@@ -84,12 +197,138 @@ class Post(models.Model):
         blank=True,
         upload_to='images'
     )
+    # Уменьшенные копии фото (JPEG и WebP), см. blog/images.py
+    image_variants = models.JSONField(
+        'Варианты фото',
+        default=dict,
+        blank=True,
+        editable=False
+    )
     created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
+    # Опубликована, дата публикации наступила и категория опубликована.
+    # Отложенные публикации открывает команда publish_scheduled, скрытие
+    # категории распространяется одним UPDATE (см. CategoryQuerySet)
+    is_visible = models.BooleanField(
+        'Видна читателям',
+        default=False,
+        editable=False
+    )
+    # Поддерживается сигналами комментариев, см. blog/signals.py
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
+    # Считаются из text при сохранении, см. blog/text.py
+    excerpt = models.TextField('Отрывок', blank=True, editable=False)
+    text_html = models.TextField('Текст в HTML', blank=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
+        # Индексы лент (порядок полей совпадает с сортировкой курсора):
+        # index -> post_published_feed_idx;
+        # category_posts -> post_category_feed_idx;
+        # user_profile -> post_author_feed_idx;
+        # post_detail -> первичный ключ,
+        # комментарии к посту -> comment_post_created_idx (Comment.Meta).
+        # publish_scheduled -> post_scheduled_idx.
+        # export_data -> post_updated_idx (и comment_updated_idx).
+        # Частичные индексы используются SQLite, только если в запросе
+        # есть то же условие (is_visible=True и т. п.).
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                condition=models.Q(is_visible=True),
+                name='post_published_feed_idx'
+            ),
+            models.Index(
+                fields=('category', '-pub_date', '-id'),
+                condition=models.Q(is_visible=True),
+                name='post_category_feed_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx'
+            ),
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_published=True, is_visible=False),
+                name='post_scheduled_idx'
+            ),
+            models.Index(
+                fields=('updated_at', 'id'),
+                name='post_updated_idx'
+            ),
+        )
+
+    def _image_sources(self, size):
+        # Пока копии не готовы (или устарели), шаблоны выводят оригинал
+        # Размер, добавленный в POST_IMAGE_SIZES позже, тоже не готов
+        variants = self.image_variants
+        if (
+            not self.image or variants.get('source') != self.image.name
+            or size not in variants
+        ):
+            return None
+        srcset = []
+        webp_srcset = []
+        for variant in sorted(
+            (variants[name] for name in variants if name != 'source'),
+            key=lambda variant: variant['width']
+        ):
+            width = variant['width']
+            srcset.append(f"{default_storage.url(variant['jpg'])} {width}w")
+            webp_srcset.append(
+                f"{default_storage.url(variant['webp'])} {width}w"
+            )
+        return {
+            'src': default_storage.url(variants[size]['jpg']),
+            'srcset': ', '.join(srcset),
+            'webp_srcset': ', '.join(webp_srcset),
+        }
+
+    @property
+    def card_image(self):
+        return self._image_sources('card')
+
+    @property
+    def detail_image(self):
+        return self._image_sources('detail')
+
+    def save(self, *args, **kwargs):
+        self.is_visible = (
+            self.is_published
+            and self.pub_date <= timezone.now()
+            and self.category is not None
+            and self.category.is_published
+        )
+        rendered = render_text_fields(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = {*update_fields, 'is_visible'}
+            if 'text' in update_fields:
+                update_fields.update(rendered)
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        kwargs = with_rendered_fields(self.model, kwargs)
+        if not touches(kwargs):
+            return super().update(**kwargs)
+        kwargs['updated_at'] = timezone.now()
+        post_ids = set(self.values_list('post_id', flat=True))
+        rows = super().update(**kwargs)
+        from .cache import invalidate
+        invalidate(*(f'post:{post_id}' for post_id in post_ids))
+        return rows
 
 
 class Comment(models.Model):
@@ -104,9 +343,81 @@ class Comment(models.Model):
         verbose_name='Автор комментария'
     )
     text = models.TextField('Текст')
+    text_html = models.TextField('Текст в HTML', blank=True, editable=False)
     created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at', 'id'),
+                name='comment_post_created_idx'
+            ),
+            models.Index(
+                fields=('updated_at', 'id'),
+                name='comment_updated_idx'
+            ),
+        )
+
+    def save(self, *args, **kwargs):
+        rendered = render_text_fields(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, *rendered}
+        super().save(*args, **kwargs)
+
+
+class AuthorStats(models.Model):
+    """Счётчики автора для страницы профиля.
+
+    Меняются сигналами публикаций и комментариев (blog/signals.py),
+    массовые операции пересчитывают их через blog.stats.
+    """
+
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор'
+    )
+    published_posts = models.PositiveIntegerField(
+        'Видимых публикаций', default=0
+    )
+    total_posts = models.PositiveIntegerField('Всего публикаций', default=0)
+    comments_received = models.PositiveIntegerField(
+        'Комментариев к публикациям', default=0
+    )
+    comments_written = models.PositiveIntegerField(
+        'Написано комментариев', default=0
+    )
+    last_activity = models.DateTimeField(
+        'Последняя активность', null=True, blank=True
+    )
+
+    class Meta:
+        verbose_name = 'статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return f'Статистика {self.author_id}'
+
+
+def actual_comment_count():
+    # Подзапрос с числом комментариев публикации, для пересчёта счётчика
+    return Coalesce(
+        Subquery(
+            Comment.objects.filter(
+                post=OuterRef('pk')
+            ).order_by().values('post').annotate(
+                total=models.Count('pk')
+            ).values('total'),
+            output_field=models.IntegerField()
+        ),
+        0
+    )
@@ -0,0 +1,199 @@
+import base64
+import binascii
+import datetime
+import json
+from collections.abc import Sequence
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import QueryDict
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder обрезает время до миллисекунд, а курсору нужно
+    # точное значение, иначе записи с той же миллисекундой повторятся
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values, reverse=False):
+    payload = json.dumps({'v': values, 'r': reverse}, cls=CursorEncoder)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return list(payload['v']), bool(payload['r'])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise InvalidCursor(cursor)
+
+
+def get_value(obj, name):
+    # Строки из .values() — словари, всё остальное — объекты
+    if isinstance(obj, dict):
+        return obj[name]
+    return getattr(obj, name)
+
+
+class KeysetPage(Sequence):
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None, query=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.query = query
+
+    def __repr__(self):
+        return f'<Keyset page of {len(self)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def _query_with(self, cursor):
+        # Сохраняем остальные GET-параметры (например, строку поиска)
+        if self.query is not None:
+            query = self.query.copy()
+        else:
+            query = QueryDict(mutable=True)
+        query.pop('page', None)
+        query.pop('cursor', None)
+        if cursor is not None:
+            query['cursor'] = cursor
+        return query.urlencode()
+
+    @property
+    def first_query(self):
+        return self._query_with(None)
+
+    @property
+    def next_query(self):
+        return self._query_with(self.next_cursor)
+
+    @property
+    def previous_query(self):
+        return self._query_with(self.previous_cursor)
+
+
+class KeysetPaginator:
+    """Пагинация по ключу сортировки вместо OFFSET.
+
+    Курсор хранит значения полей сортировки последней (или первой)
+    записи страницы, поэтому стоимость любой страницы одинакова.
+    """
+
+    def __init__(self, object_list, per_page, ordering=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.model = object_list.model
+        if ordering is None:
+            ordering = (
+                object_list.query.order_by or self.model._meta.ordering
+            )
+        self.ordering = self._with_tiebreaker(ordering)
+
+    def _with_tiebreaker(self, ordering):
+        pk_name = self.model._meta.pk.name
+        fields = []
+        for name in ordering:
+            if not isinstance(name, str):
+                raise ValueError(
+                    'Keyset pagination supports only field name ordering.'
+                )
+            if name.lstrip('-') == 'pk':
+                name = name.replace('pk', pk_name)
+            fields.append(name)
+        if pk_name not in {name.lstrip('-') for name in fields}:
+            # Уникальный хвост сортировки: без него курсор неоднозначен
+            descending = bool(fields) and fields[-1].startswith('-')
+            fields.append(f'-{pk_name}' if descending else pk_name)
+        return tuple(fields)
+
+    def _to_python(self, values):
+        if len(values) != len(self.ordering):
+            raise InvalidCursor(values)
+        result = []
+        for name, value in zip(self.ordering, values):
+            try:
+                field = self.model._meta.get_field(name.lstrip('-'))
+            except FieldDoesNotExist:
+                result.append(value)
+                continue
+            try:
+                result.append(field.to_python(value))
+            except ValidationError:
+                raise InvalidCursor(values)
+        return result
+
+    def _seek_filter(self, values, reverse):
+        # (a, b) после (x, y): a > x ИЛИ (a = x И b > y)
+        query = Q()
+        for i, name in enumerate(self.ordering):
+            descending = name.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            condition = Q(**{f'{name.lstrip("-")}__{lookup}': values[i]})
+            for prev_name, prev_value in zip(self.ordering[:i], values):
+                condition &= Q(**{prev_name.lstrip('-'): prev_value})
+            query |= condition
+        return query
+
+    def _cursor(self, obj, reverse):
+        values = [get_value(obj, name.lstrip('-')) for name in self.ordering]
+        return encode_cursor(values, reverse)
+
+    def get_page(self, cursor=None, query=None):
+        values, reverse = None, False
+        if cursor:
+            try:
+                values, reverse = decode_cursor(cursor)
+                values = self._to_python(values)
+            except InvalidCursor:
+                # Битый курсор — отдаём первую страницу
+                values, reverse = None, False
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(values, reverse))
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(
+                name[1:] if name.startswith('-') else f'-{name}'
+                for name in ordering
+            )
+        # Берём на одну запись больше, чтобы узнать о следующей странице
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = values is not None, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self._cursor(rows[-1], False)
+        if rows and has_previous:
+            previous_cursor = self._cursor(rows[0], True)
+        return KeysetPage(rows, self, next_cursor, previous_cursor, query)
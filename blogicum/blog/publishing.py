@@ -0,0 +1,48 @@
+from django.db.models import Min
+from django.urls import reverse
+from django.utils import timezone
+
+from .cache import invalidate_posts, warm_pages
+from .models import Category, Post
+from .stats import refresh_author_stats
+
+
+def scheduled_posts():
+    # Публикации в скрытых категориях откроются вместе с категорией
+    return Post.objects.filter(
+        is_published=True,
+        is_visible=False,
+        category__is_published=True
+    )
+
+
+def next_publication_time():
+    return scheduled_posts().aggregate(
+        next_pub_date=Min('pub_date')
+    )['next_pub_date']
+
+
+def publish_due_posts(now=None, warm=False):
+    # Открывает отложенные публикации, время которых наступило
+    now = now or timezone.now()
+    posts = list(scheduled_posts().filter(
+        pub_date__lte=now
+    ).only('category_id', 'author_id'))
+    if not posts:
+        return posts
+    scheduled_posts().filter(
+        pk__in=[post.pk for post in posts],
+        pub_date__lte=now
+    ).update(is_visible=True, updated_at=now)
+    invalidate_posts(posts)
+    refresh_author_stats({post.author_id for post in posts})
+    if warm:
+        slugs = Category.objects.filter(
+            pk__in={post.category_id for post in posts},
+            is_published=True
+        ).values_list('slug', flat=True)
+        warm_pages([
+            reverse('blog:index'),
+            *(reverse('blog:category_posts', args=[slug]) for slug in slugs),
+        ])
+    return posts
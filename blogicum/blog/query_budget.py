@@ -0,0 +1,126 @@
+"""Учёт SQL-запросов на запрос к сайту и бюджеты по представлениям.
+
+QueryBudgetMiddleware для доли запросов (QUERY_BUDGET_SAMPLE_RATE)
+считает число и суммарное время SQL-запросов, повторы одного и того же
+запроса и ленивые загрузки внешних ключей (post.location без
+select_related). Нарушения бюджета пишутся в лог 'blog.queries', а в
+строгом режиме (QUERY_BUDGET_STRICT, для тестов) вызывают исключение.
+"""
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.models.fields.related_descriptors import (
+    ForwardManyToOneDescriptor
+)
+
+logger = logging.getLogger('blog.queries')
+
+current_stats = ContextVar('query_stats', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryStats:
+    """Обёртка execute_wrapper, собирающая статистику запросов."""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.statements = Counter()
+        self.lazy_loads = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - started
+            self.count += 1
+            # Параметры не учитываются: N+1 — это один и тот же шаблон
+            # запроса с разными id
+            self.statements[sql] += 1
+
+    def problems(self, view_name, authenticated=False):
+        budget = settings.QUERY_BUDGETS.get(
+            view_name, settings.QUERY_BUDGET_DEFAULT
+        )
+        if budget is not None and authenticated:
+            # Бюджеты заданы для анонима; сессия и пользователь сверху
+            budget += settings.QUERY_BUDGET_AUTH_QUERIES
+        repeats = settings.QUERY_BUDGET_REPEATS
+        problems = []
+        if budget is not None and self.count > budget:
+            problems.append(f'{self.count} queries (budget {budget})')
+        if self.time > settings.QUERY_BUDGET_TIME:
+            problems.append(f'{self.time * 1000:.0f} ms in SQL')
+        problems += [
+            f'{count}x {sql[:200]}'
+            for sql, count in self.statements.most_common()
+            if count > repeats
+        ]
+        problems += [
+            f'{count}x lazy load of {field}'
+            for field, count in self.lazy_loads.most_common()
+            if count > repeats
+        ]
+        return problems
+
+
+def track_lazy_loads():
+    """Считает загрузки внешних ключей, не взятых через select_related."""
+    original = ForwardManyToOneDescriptor.get_object
+    if getattr(original, 'tracks_lazy_loads', False):
+        return
+
+    def get_object(self, instance):
+        stats = current_stats.get()
+        if stats is not None:
+            stats.lazy_loads[
+                f'{self.field.model._meta.label}.{self.field.name}'
+            ] += 1
+        return original(self, instance)
+
+    get_object.tracks_lazy_loads = True
+    ForwardManyToOneDescriptor.get_object = get_object
+
+
+class QueryBudgetMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.QUERY_BUDGET_SAMPLE_RATE:
+            return self.get_response(request)
+        stats = QueryStats()
+        token = current_stats.set(stats)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        match = request.resolver_match
+        view_name = match.view_name if match else request.path
+        user = getattr(request, 'user', None)
+        problems = stats.problems(
+            view_name, user is not None and user.is_authenticated
+        )
+        if problems:
+            message = (
+                f'Query budget exceeded in {view_name}: '
+                + '; '.join(problems)
+            )
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
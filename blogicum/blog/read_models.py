@@ -0,0 +1,95 @@
+"""Лёгкие строки публикаций для лент вместо экземпляров моделей.
+
+Карточке в ленте нужны заголовок, отрывок текста, дата, ссылки на
+автора и категорию. post_rows() выбирает только эти столбцы, а вместо
+всего Post.text — готовый Post.excerpt (см. blog/text.py). Строки
+превращаются в PostRow со __slots__; категория и место берутся из
+снимка каталога (blog/catalog.py), поэтому JOIN нужен только для
+имени автора.
+
+Включается настройкой BLOG_FEED_READ_MODELS.
+"""
+from collections import namedtuple
+
+from django.core.files.storage import default_storage
+
+from .catalog import get_catalog
+from .models import Post
+
+ROW_FIELDS = (
+    'id', 'title', 'excerpt', 'pub_date', 'updated_at', 'is_published',
+    'comment_count', 'image', 'image_variants', 'author__username',
+    'category_id', 'location_id',
+)
+
+AuthorRow = namedtuple('AuthorRow', ('username',))
+
+
+class ImageRow:
+    """Замена FieldFile: в шаблоне нужны только bool() и url."""
+
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __bool__(self):
+        return bool(self.name)
+
+    @property
+    def url(self):
+        return default_storage.url(self.name)
+
+
+class PostRow:
+    __slots__ = (
+        'id', 'title', 'excerpt', 'pub_date', 'updated_at', 'is_published',
+        'comment_count', 'image', 'image_variants', 'author', 'category',
+        'location', 'card_html',
+    )
+
+    def __init__(self, row, catalog):
+        self.id = row['id']
+        self.title = row['title']
+        self.excerpt = row['excerpt']
+        self.pub_date = row['pub_date']
+        self.updated_at = row['updated_at']
+        self.is_published = row['is_published']
+        self.comment_count = row['comment_count']
+        self.image = ImageRow(row['image'])
+        self.image_variants = row['image_variants']
+        self.author = AuthorRow(row['author__username'])
+        self.category = catalog.categories.get(row['category_id'])
+        self.location = catalog.locations.get(row['location_id'])
+        self.card_html = None
+
+    def __repr__(self):
+        return f'<PostRow {self.id}>'
+
+    def __eq__(self, other):
+        # Как у моделей: одна и та же публикация, если совпадает id
+        if not isinstance(other, PostRow):
+            return NotImplemented
+        return self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def card_image(self):
+        # Те же правила выбора уменьшенных копий, что у модели
+        return Post._image_sources(self, 'card')
+
+
+def post_rows(queryset):
+    """Queryset публикаций как словари только с нужными ленте полями."""
+    return queryset.values(*ROW_FIELDS)
+
+
+def to_post_rows(rows):
+    catalog = get_catalog()
+    return [PostRow(row, catalog) for row in rows]
@@ -0,0 +1,124 @@
+"""Чтение из реплик базы данных.
+
+Страницы с read_from_replica читают модели блога из одной из реплик
+(DATABASE_REPLICAS), остальное — из основной базы. Пользователи и
+сессии всегда читаются из основной: в отстающей реплике может не
+оказаться только что созданной сессии.
+
+После изменяющего запроса ReplicaPinMiddleware ставит cookie, и
+REPLICA_PIN_SECONDS страницы этого браузера читаются из основной базы:
+автор сразу видит свою публикацию или комментарий.
+
+Реплика выбирается одна на запрос. sync_replicas отмечает в кэше время
+снимка каждой реплики; если группы страницы менялись позже
+(blog.cache.conditional_page), страница читается из основной базы:
+иначе старые данные попали бы в кэш страниц под новой версией и с
+новым ETag. Отметку видят только процессы с общим кэшем, с locmem
+страницы всегда читаются из основной базы.
+"""
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+
+PIN_COOKIE = 'blog_primary'
+REPLICA_APPS = ('blog',)
+SAFE_METHODS = ('GET', 'HEAD')
+SYNCED_KEY = 'blog:replica_synced:{}'
+
+# Реплика, из которой читает текущий запрос
+replica_reads = ContextVar('replica_reads', default=None)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        alias = replica_reads.get()
+        if alias in settings.DATABASE_REPLICAS and (
+            model._meta.app_label in REPLICA_APPS
+        ):
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схема реплик приходит вместе с копией основной базы
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+def is_pinned(request):
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def get_cache():
+    return caches[settings.BLOG_CACHE_ALIAS]
+
+
+def mark_synced(alias, moment):
+    get_cache().set(SYNCED_KEY.format(alias), moment, None)
+
+
+def read_primary_if_stale(modified):
+    """Переводит запрос на основную базу, если реплика старше modified."""
+    alias = replica_reads.get()
+    if alias is None:
+        return
+    synced = get_cache().get(SYNCED_KEY.format(alias))
+    if synced is None or synced < modified:
+        replica_reads.set(None)
+
+
+def read_from_replica(view):
+    """Запросы GET и HEAD представления читают блог из реплики."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (
+            request.method not in SAFE_METHODS
+            or not settings.DATABASE_REPLICAS
+            or is_pinned(request)
+        ):
+            return view(request, *args, **kwargs)
+        token = replica_reads.set(random.choice(settings.DATABASE_REPLICAS))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            replica_reads.reset(token)
+    return wrapper
+
+
+class ReplicaPinMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            until = time.time() + settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                PIN_COOKIE, f'{until:.0f}',
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True,
+                samesite='Lax'
+            )
+        return response
@@ -0,0 +1,147 @@
+import re
+
+from django.db import connections, router, transaction
+
+from .models import Post
+from .pagination import InvalidCursor, KeysetPage, decode_cursor, encode_cursor
+
+# Таблица создаётся миграцией 0011_post_search_index
+FTS_TABLE = 'blog_post_fts'
+# Ранжирование bm25 (чем меньше, тем релевантнее) и пагинация по
+# ключу (rank, id); в выдачу попадают только видимые публикации
+SEARCH_SQL = f'''
+    SELECT rank, id FROM (
+        SELECT {FTS_TABLE}.rowid AS id, bm25({FTS_TABLE}) AS rank
+        FROM {FTS_TABLE}
+        JOIN blog_post ON blog_post.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s AND blog_post.is_visible
+    )
+    {{seek}}
+    ORDER BY rank {{direction}}, id {{direction}}
+    LIMIT %s
+'''
+SEEK_FORWARD = 'WHERE rank > %s OR (rank = %s AND id > %s)'
+SEEK_BACKWARD = 'WHERE rank < %s OR (rank = %s AND id < %s)'
+
+
+def is_supported(connection):
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(text):
+    # Каждое слово в кавычках, чтобы ввод не разбирался как синтаксис
+    # FTS5; последнее слово ищется по префиксу
+    words = re.findall(r'\w+', text)
+    if not words:
+        return ''
+    return ' '.join(f'"{word}"' for word in words) + '*'
+
+
+def index_posts(posts, using='default'):
+    connection = connections[using]
+    if not is_supported(connection):
+        return
+    rows = [(post.pk, post.title, post.text) for post in posts]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(pk,) for pk, *_ in rows]
+        )
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, text) '
+            'VALUES (%s, %s, %s)',
+            rows
+        )
+
+
+def unindex_posts(post_ids, using='default'):
+    connection = connections[using]
+    if not is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(pk,) for pk in post_ids]
+        )
+
+
+def rebuild_index(batch_size=1000, using='default'):
+    """Перестраивает индекс на месте, пачками по возрастанию pk.
+
+    Генератор: после каждой пачки отдаёт число проиндексированных.
+    Строки пачки заменяются по одной в её транзакции, а строки
+    удалённых публикаций убираются в конце, поэтому поиск работает
+    всё время перестройки.
+    """
+    connection = connections[using]
+    if not is_supported(connection):
+        return
+    indexed = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic(using=using):
+            posts = list(
+                Post.objects.using(using).filter(
+                    pk__gt=last_pk
+                ).order_by('pk').only('title', 'text')[:batch_size]
+            )
+            if not posts:
+                break
+            index_posts(posts, using)
+        last_pk = posts[-1].pk
+        indexed += len(posts)
+        yield indexed
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} '
+            'WHERE rowid NOT IN (SELECT id FROM blog_post)'
+        )
+
+
+def search_posts(text, cursor=None, per_page=10, query=None):
+    match = build_match_query(text)
+    if not match:
+        return KeysetPage([], None, query=query)
+    using = router.db_for_read(Post)
+    connection = connections[using]
+    if not is_supported(connection):
+        return KeysetPage([], None, query=query)
+    values, reverse = None, False
+    if cursor:
+        try:
+            values, reverse = decode_cursor(cursor)
+            rank, pk = float(values[0]), int(values[1])
+            values = [rank, pk]
+        except (InvalidCursor, IndexError, TypeError, ValueError):
+            values, reverse = None, False
+    params = [match]
+    seek = ''
+    if values is not None:
+        seek = SEEK_BACKWARD if reverse else SEEK_FORWARD
+        params += [rank, rank, pk]
+    params.append(per_page + 1)
+    sql = SEARCH_SQL.format(
+        seek=seek, direction='DESC' if reverse else 'ASC'
+    )
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(sql, params)
+        rows = db_cursor.fetchall()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if reverse:
+        rows.reverse()
+        has_next, has_previous = values is not None, has_more
+    else:
+        has_next, has_previous = has_more, values is not None
+    posts = Post.objects.using(using).select_related(
+        'author'
+    ).in_bulk([pk for _, pk in rows])
+    object_list = [posts[pk] for _, pk in rows if pk in posts]
+    next_cursor = previous_cursor = None
+    if rows and has_next:
+        next_cursor = encode_cursor(list(rows[-1]), False)
+    if rows and has_previous:
+        previous_cursor = encode_cursor(list(rows[0]), True)
+    return KeysetPage(
+        object_list, None, next_cursor, previous_cursor, query
+    )
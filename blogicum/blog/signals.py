@@ -0,0 +1,178 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import (
+    post_delete, post_init, post_save, pre_save
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate, invalidate_post_id, invalidate_posts
+from .images import discard_derivatives, schedule_derivatives
+from .importing import after_insert
+from .models import AuthorStats, Category, Comment, Location, Post
+from .search import index_posts, unindex_posts
+from .stats import (
+    comment_changed, comment_removed, post_changed, post_removed,
+    refresh_author_stats
+)
+from .text import render_text_fields
+
+User = get_user_model()
+
+
+def change_comment_count(post_id, delta):
+    # Атомарное изменение счётчика на стороне БД, без чтения строки.
+    # Не ниже нуля: разошедшийся счётчик не должен ронять удаление
+    Post.objects.filter(pk=post_id).update(
+        comment_count=Greatest(F('comment_count') + delta, Value(0)),
+        # Счётчик выгружается, поэтому изменение отмечается
+        updated_at=timezone.now()
+    )
+
+
+# Исходные значения читаются из __dict__: поле, отложенное через
+# only()/defer(), иначе загружалось бы отдельным запросом на объект
+@receiver(post_init, sender=Comment)
+def remember_comment_post(sender, instance, **kwargs):
+    instance._loaded_post_id = instance.__dict__.get('post_id')
+
+
+@receiver(post_init, sender=Post)
+def remember_post_state(sender, instance, **kwargs):
+    instance._loaded_category_id = instance.__dict__.get('category_id')
+    instance._loaded_author_id = instance.__dict__.get('author_id')
+    instance._loaded_is_visible = instance.__dict__.get('is_visible')
+
+
+@receiver(post_init, sender=Category)
+def remember_category_state(sender, instance, **kwargs):
+    instance._loaded_is_published = instance.__dict__.get('is_published')
+
+
+@receiver(post_init, sender=User)
+def remember_username(sender, instance, **kwargs):
+    instance._loaded_username = instance.__dict__.get('username')
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+def fill_raw_fields(sender, instance, raw=False, **kwargs):
+    # loaddata не вызывает save() модели и pre_save полей: auto_now не
+    # срабатывает, а фикстуры, снятые раньше, не содержат новых полей
+    if not raw:
+        return
+    if instance.updated_at is None:
+        instance.updated_at = instance.created_at or timezone.now()
+    render_text_fields(instance)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, using='default',
+                  **kwargs):
+    if raw:
+        # loaddata: счётчики пересчитываются, как после импорта
+        after_insert(Comment, [instance], using)
+        invalidate_post_id(instance.post_id, [instance.author_id])
+        return
+    comment_changed(instance, created, instance._loaded_post_id)
+    if created:
+        change_comment_count(instance.post_id, 1)
+    elif instance._loaded_post_id != instance.post_id:
+        # Комментарий перенесли к другой публикации (например, в админке)
+        change_comment_count(instance._loaded_post_id, -1)
+        change_comment_count(instance.post_id, 1)
+        invalidate_post_id(instance._loaded_post_id)
+    instance._loaded_post_id = instance.post_id
+    # Счётчик комментариев виден и в профиле их автора
+    invalidate_post_id(instance.post_id, [instance.author_id])
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    # Срабатывает и для удалений из админки, и для каскадных удалений
+    change_comment_count(instance.post_id, -1)
+    comment_removed(instance)
+    invalidate_post_id(instance.post_id, [instance.author_id])
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created=False, raw=False, using='default',
+               **kwargs):
+    # Прежняя категория тоже теряет публикацию
+    invalidate_posts([instance], [instance._loaded_category_id])
+    if raw:
+        # loaddata: видимость, счётчики и индекс поиска — как после
+        # импорта; категория могла загрузиться позже, см. category_saved
+        after_insert(Post, [instance], using)
+    else:
+        post_changed(instance, created)
+        index_posts([instance], using)
+    instance._loaded_category_id = instance.category_id
+    instance._loaded_author_id = instance.author_id
+    instance._loaded_is_visible = instance.is_visible
+    schedule_derivatives(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, using='default', **kwargs):
+    invalidate_posts([instance])
+    unindex_posts([instance.pk], using)
+    post_removed(instance)
+    discard_derivatives(instance)
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created, raw=False, using='default',
+                   **kwargs):
+    if raw:
+        # loaddata: публикации могли загрузиться раньше категории
+        Post.objects.using(using).filter(
+            category=instance
+        ).sync_visibility()
+    if raw or created:
+        return
+    if instance._loaded_is_published != instance.is_published:
+        # Один UPDATE на все публикации категории
+        Post.objects.filter(category=instance).sync_visibility()
+    instance._loaded_is_published = instance.is_published
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    # Публикации удалённой категории уже получили category = NULL
+    Post.objects.filter(
+        category__isnull=True, is_visible=True
+    ).sync_visibility()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def catalog_changed(sender, **kwargs):
+    # Категории и места видны почти на всех страницах
+    invalidate('catalog')
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, raw=False,
+               using='default', **kwargs):
+    if update_fields and set(update_fields) == {'last_login'}:
+        # Вход пользователя не меняет страницы
+        return
+    if created and raw:
+        # loaddata: публикации автора могли загрузиться раньше
+        refresh_author_stats([instance.pk], using)
+    elif created:
+        AuthorStats.objects.create(author=instance)
+    if not created and instance._loaded_username != instance.username:
+        # Имя автора выводится в карточках и комментариях
+        invalidate('catalog')
+    invalidate(f'profile:{instance.username}')
+    instance._loaded_username = instance.username
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate(f'profile:{instance.username}')
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+from abc import ABC, abstractmethod
+from xml.sax.saxutils import escape
+
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, Max, OuterRef
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Category, Post
+
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+INDEX_FILE = 'index.xml'
+MANIFEST_FILE = 'manifest.json'
+
+
+class Section(ABC):
+    """Раздел карты сайта, разбитый на файлы по диапазонам первичного ключа.
+
+    Файл N содержит объекты с pk в (N * size, (N + 1) * size]: выборка
+    идёт по первичному ключу без OFFSET, а изменение объекта затрагивает
+    только его файл.
+    """
+
+    name = None
+    model = None
+
+    @abstractmethod
+    def get_queryset(self):
+        pass
+
+    @abstractmethod
+    def get_urls(self, queryset):
+        """Пары (путь, время изменения или None)."""
+
+    def get_signature(self, queryset):
+        # Дешёвый признак изменения файла; None — сравнивать содержимое
+        return None
+
+    def shard_count(self, size):
+        max_pk = self.model.objects.aggregate(max_pk=Max('pk'))['max_pk']
+        return 0 if max_pk is None else max_pk // size + 1
+
+    def shard(self, number, size):
+        return self.get_queryset().filter(
+            pk__gt=number * size, pk__lte=(number + 1) * size
+        ).order_by('pk')
+
+
+class PostsSection(Section):
+    name = 'posts'
+    model = Post
+
+    def get_queryset(self):
+        return Post.objects.published()
+
+    def get_urls(self, queryset):
+        for pk, updated_at in queryset.values_list('pk', 'updated_at'):
+            yield reverse('blog:post_detail', args=(pk,)), updated_at
+
+    def get_signature(self, queryset):
+        # Правки меняют updated_at, а набор видимых id — хэш: одна
+        # публикация может скрыться, а другая открыться, не меняя ни
+        # числа строк, ни последнего updated_at
+        updated_at = queryset.aggregate(
+            updated_at=Max('updated_at')
+        )['updated_at']
+        ids = hashlib.md5()
+        for pk in queryset.values_list('pk', flat=True).iterator():
+            ids.update(f'{pk},'.encode())
+        return [ids.hexdigest(), updated_at and updated_at.isoformat()]
+
+
+class CategoriesSection(Section):
+    name = 'categories'
+    model = Category
+
+    def get_queryset(self):
+        return Category.objects.filter(is_published=True)
+
+    def get_urls(self, queryset):
+        for slug in queryset.values_list('slug', flat=True):
+            yield reverse('blog:category_posts', args=(slug,)), None
+
+
+class ProfilesSection(Section):
+    name = 'profiles'
+
+    @property
+    def model(self):
+        return get_user_model()
+
+    def get_queryset(self):
+        # Только авторы, у которых есть что читать
+        return self.model.objects.filter(Exists(
+            Post.objects.published().filter(author=OuterRef('pk'))
+        ))
+
+    def get_urls(self, queryset):
+        for username in queryset.values_list('username', flat=True):
+            yield reverse('blog:profile', args=(username,)), None
+
+
+SECTIONS = (PostsSection(), CategoriesSection(), ProfilesSection())
+
+
+def format_lastmod(value):
+    return value.isoformat(timespec='seconds')
+
+
+def render_urlset(base_url, urls):
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        f'<urlset xmlns="{XMLNS}">\n',
+    ]
+    for path, lastmod in urls:
+        lines.append(f'<url><loc>{escape(base_url + path)}</loc>')
+        if lastmod is not None:
+            lines.append(f'<lastmod>{format_lastmod(lastmod)}</lastmod>')
+        lines.append('</url>\n')
+    lines.append('</urlset>\n')
+    return ''.join(lines)
+
+
+def render_index(base_url, files):
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        f'<sitemapindex xmlns="{XMLNS}">\n',
+    ]
+    for filename, lastmod in files:
+        name, _ = os.path.splitext(filename)
+        path = reverse('blog:sitemap_shard', args=(name,))
+        loc = escape(base_url + path)
+        lines.append(
+            f'<sitemap><loc>{loc}</loc>'
+            f'<lastmod>{lastmod}</lastmod></sitemap>\n'
+        )
+    lines.append('</sitemapindex>\n')
+    return ''.join(lines)
+
+
+def write_file(root, filename, content):
+    # Через временный файл: краулер не увидит недописанный XML
+    path = os.path.join(root, filename)
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as stream:
+        stream.write(content)
+    os.replace(f'{path}.tmp', path)
+
+
+def load_manifest(root, base_url):
+    try:
+        with open(os.path.join(root, MANIFEST_FILE), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('base_url') != base_url:
+        return {}
+    return manifest.get('files', {})
+
+
+def build_sitemaps(root, base_url, size, force=False):
+    """Обновляет файлы карты сайта в каталоге root.
+
+    Генератор: для каждого непустого файла отдаёт (имя, перезаписан ли
+    он). Файлы, чьи строки не менялись, не перезаписываются, поэтому
+    их Last-Modified и lastmod в индексе остаются прежними.
+    """
+    os.makedirs(root, exist_ok=True)
+    base_url = base_url.rstrip('/')
+    manifest = load_manifest(root, base_url)
+    previous = {} if force else manifest
+    files = {}
+    for section in SECTIONS:
+        for number in range(section.shard_count(size)):
+            filename = f'{section.name}-{number}.xml'
+            queryset = section.shard(number, size)
+            signature = section.get_signature(queryset)
+            known = previous.get(filename)
+            if known and signature is not None and (
+                    known['signature'] == signature):
+                files[filename] = known
+                yield filename, False
+                continue
+            urls = list(section.get_urls(queryset))
+            if not urls:
+                continue
+            content = render_urlset(base_url, urls)
+            digest = hashlib.md5(content.encode()).hexdigest()
+            changed = not known or known['hash'] != digest
+            if changed:
+                write_file(root, filename, content)
+            files[filename] = {
+                'signature': signature,
+                'hash': digest,
+                'lastmod': (
+                    format_lastmod(timezone.now()) if changed
+                    else known['lastmod']
+                ),
+            }
+            yield filename, changed
+    # Файлы опустевших диапазонов удаляются
+    for filename in manifest.keys() - files.keys():
+        try:
+            os.remove(os.path.join(root, filename))
+        except FileNotFoundError:
+            pass
+    write_file(root, INDEX_FILE, render_index(
+        base_url,
+        [(filename, files[filename]['lastmod']) for filename in files]
+    ))
+    write_file(root, MANIFEST_FILE, json.dumps(
+        {'base_url': base_url, 'files': files}, indent=1
+    ))
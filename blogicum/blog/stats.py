@@ -0,0 +1,153 @@
+"""Счётчики авторов (AuthorStats) для страницы профиля.
+
+Сигналы публикаций и комментариев меняют счётчики на ±1 одним UPDATE
+(change_author_stats). Массовые операции — пересчёт видимости,
+импорт — пересчитывают их целиком (refresh_author_stats). Строка
+автора, которой ещё нет, создаётся при первом показе профиля.
+"""
+from django.db.models import Count, F, Max, Q, QuerySet, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import AuthorStats, Comment, Post
+
+BATCH_SIZE = 500
+COUNTERS = (
+    'published_posts', 'total_posts', 'comments_received',
+    'comments_written',
+)
+
+
+def post_author(post_id):
+    # Подзапрос вместо чтения публикации
+    return Post.objects.filter(pk=post_id).values('author')
+
+
+def change_author_stats(authors, touch=False, **deltas):
+    """Меняет счётчики автора (id или подзапрос) на deltas.
+
+    touch отмечает время последней активности. Если строки автора
+    нет, ничего не происходит: её посчитает refresh_author_stats.
+    """
+    values = {
+        # Не ниже нуля, даже если счётчик успел разойтись с данными
+        name: Greatest(F(name) + delta, Value(0))
+        for name, delta in deltas.items() if delta
+    }
+    if touch:
+        values['last_activity'] = timezone.now()
+    if not values or authors is None:
+        return
+    if isinstance(authors, QuerySet):
+        queryset = AuthorStats.objects.filter(author__in=authors)
+    else:
+        queryset = AuthorStats.objects.filter(author=authors)
+    queryset.update(**values)
+
+
+def latest(*moments):
+    moments = [moment for moment in moments if moment is not None]
+    return max(moments) if moments else None
+
+
+def count_author_stats(author_ids, using='default'):
+    """Считает строки авторов по публикациям и комментариям, не сохраняя."""
+    stats = {pk: AuthorStats(author_id=pk) for pk in author_ids}
+    # order_by() убирает сортировку модели из GROUP BY
+    for row in Post.objects.using(using).filter(
+        author__in=author_ids
+    ).order_by().values('author').annotate(
+        total=Count('pk'),
+        published=Count('pk', filter=Q(is_visible=True)),
+        last=Max('updated_at'),
+    ):
+        item = stats[row['author']]
+        item.total_posts = row['total']
+        item.published_posts = row['published']
+        item.last_activity = row['last']
+    for row in Comment.objects.using(using).filter(
+        post__author__in=author_ids
+    ).order_by().values('post__author').annotate(total=Count('pk')):
+        stats[row['post__author']].comments_received = row['total']
+    for row in Comment.objects.using(using).filter(
+        author__in=author_ids
+    ).order_by().values('author').annotate(
+        total=Count('pk'), last=Max('updated_at')
+    ):
+        item = stats[row['author']]
+        item.comments_written = row['total']
+        item.last_activity = latest(item.last_activity, row['last'])
+    return stats
+
+
+def refresh_batch(author_ids, using):
+    stats = count_author_stats(author_ids, using)
+    AuthorStats.objects.using(using).bulk_create(
+        stats.values(), ignore_conflicts=True
+    )
+    AuthorStats.objects.using(using).bulk_update(
+        stats.values(), (*COUNTERS, 'last_activity')
+    )
+    return stats
+
+
+def refresh_author_stats(author_ids, using='default'):
+    """Пересчитывает строки авторов по данным; создаёт недостающие.
+
+    Возвращает словарь {id автора: AuthorStats}.
+    """
+    author_ids = sorted(set(author_ids) - {None})
+    stats = {}
+    for start in range(0, len(author_ids), BATCH_SIZE):
+        stats.update(
+            refresh_batch(author_ids[start:start + BATCH_SIZE], using)
+        )
+    return stats
+
+
+def get_author_stats(user):
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        return refresh_author_stats([user.pk])[user.pk]
+
+
+def post_changed(post, created):
+    if created:
+        change_author_stats(
+            post.author_id, touch=True,
+            total_posts=1, published_posts=int(post.is_visible)
+        )
+        return
+    loaded = post._loaded_is_visible
+    if post._loaded_author_id != post.author_id or loaded is None:
+        # Публикацию передали другому автору или состояние неизвестно
+        refresh_author_stats([post._loaded_author_id, post.author_id])
+        return
+    change_author_stats(
+        post.author_id, touch=True,
+        published_posts=int(post.is_visible) - int(loaded)
+    )
+
+
+def post_removed(post):
+    change_author_stats(
+        post.author_id,
+        total_posts=-1, published_posts=-int(post.is_visible)
+    )
+
+
+def comment_changed(comment, created, old_post_id):
+    change_author_stats(
+        comment.author_id, touch=True, comments_written=int(created)
+    )
+    if created:
+        change_author_stats(post_author(comment.post_id), comments_received=1)
+    elif old_post_id != comment.post_id:
+        change_author_stats(post_author(old_post_id), comments_received=-1)
+        change_author_stats(post_author(comment.post_id), comments_received=1)
+
+
+def comment_removed(comment):
+    change_author_stats(comment.author_id, comments_written=-1)
+    change_author_stats(post_author(comment.post_id), comments_received=-1)
@@ -0,0 +1,86 @@
+"""Готовый HTML и отрывок текста публикаций и комментариев.
+
+Фильтры linebreaksbr и truncatewords разбирают и экранируют весь текст
+при каждом рендере. Результат не зависит ни от чего, кроме текста,
+поэтому он считается при сохранении и хранится в полях text_html и
+excerpt, а шаблоны выводят его как есть. Пока поля пусты (строки
+загружены в обход save(), text обновлён выражением), шаблоны выводят
+сам текст через фильтры.
+
+Модуль не импортирует модели: функции работают и с историческими
+моделями в миграциях.
+"""
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+# Как truncatewords:10 в карточке публикации
+EXCERPT_WORDS = 10
+
+
+def text_to_html(text):
+    return str(linebreaksbr(text, autoescape=True))
+
+
+def make_excerpt(text):
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
+
+RENDERERS = {
+    'text_html': text_to_html,
+    'excerpt': make_excerpt,
+}
+
+
+def rendered_fields(model):
+    names = {field.name for field in model._meta.get_fields()}
+    return [name for name in RENDERERS if name in names]
+
+
+def render_text_fields(instance):
+    """Заполняет поля из RENDERERS, которые есть у модели instance."""
+    fields = rendered_fields(type(instance))
+    for name in fields:
+        setattr(instance, name, RENDERERS[name](instance.text))
+    return fields
+
+
+def with_rendered_fields(model, values):
+    """Дополняет значения для QuerySet.update() готовыми полями.
+
+    Если text задан выражением, поля очищаются: шаблоны тогда выводят
+    сам текст, а render_texts досчитает их позже.
+    """
+    if 'text' not in values:
+        return values
+    text = values['text']
+    rendered = {
+        name: RENDERERS[name](text) if isinstance(text, str) else ''
+        for name in rendered_fields(model)
+    }
+    return {**values, **rendered}
+
+
+def backfill_text_fields(model, batch_size=1000, only_missing=True):
+    """Пересчитывает поля пачками по возрастанию pk.
+
+    Генератор: отдаёт размер каждой обновлённой пачки. bulk_update не
+    трогает updated_at и не отправляет сигналы.
+    """
+    fields = rendered_fields(model)
+    queryset = model.objects.only('pk', 'text', *fields).order_by('pk')
+    if only_missing:
+        queryset = queryset.filter(text_html='').exclude(text='')
+    last_pk = None
+    while True:
+        batch_queryset = queryset
+        if last_pk is not None:
+            batch_queryset = queryset.filter(pk__gt=last_pk)
+        batch = list(batch_queryset[:batch_size])
+        if not batch:
+            return
+        for instance in batch:
+            for name in fields:
+                setattr(instance, name, RENDERERS[name](instance.text))
+        model.objects.bulk_update(batch, fields)
+        last_pk = batch[-1].pk
+        yield len(batch)
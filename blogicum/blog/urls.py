@@ -1,16 +1,33 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'blog'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('feed/', feeds.posts_rss, name='feed'),
+    path('feed/atom/', feeds.posts_atom, name='feed_atom'),
     path(
         'category/<slug:category_slug>/',
         views.category_posts,
         name='category_posts'
     ),
+    path(
+        'category/<slug:category_slug>/feed/',
+        feeds.category_rss,
+        name='category_feed'
+    ),
+    path(
+        'category/<slug:category_slug>/feed/atom/',
+        feeds.category_atom,
+        name='category_feed_atom'
+    ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
@@ -30,6 +47,24 @@ urlpatterns = [
     path('posts/<int:post_id>/edit/', views.edit_post, name='edit_post'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/create/', views.create_post, name='create_post'),
+    path('search/', views.search, name='search'),
+    path('sitemap.xml', views.sitemap, name='sitemap'),
+    path(
+        'sitemaps/<slug:name>.xml',
+        views.sitemap,
+        name='sitemap_shard'
+    ),
+    path('export/<slug:dataset>/', views.export, name='export'),
     path('profile/edit/', views.edit_profile, name='edit_profile'),
     path('profile/<str:username>/', views.user_profile, name='profile'),
+    path(
+        'profile/<str:username>/feed/',
+        feeds.profile_rss,
+        name='profile_feed'
+    ),
+    path(
+        'profile/<str:username>/feed/atom/',
+        feeds.profile_atom,
+        name='profile_feed_atom'
+    ),
 ]
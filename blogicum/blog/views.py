@@ -1,151 +1,247 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.db.models import Count, Q
+from django.db.models import Max
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render, redirect
-from django.utils import timezone
+from django.views.decorators.http import require_safe
+from django.views.static import serve
 
+from .cache import (
+    attach_post_cards, cache_anonymous_page, conditional_page
+)
+from .catalog import attach_catalog, get_published_category
+from .exporting import (
+    CONTENT_TYPES, DATASETS, FORMATS, export_filename, parse_since,
+    stream_export
+)
 from .forms import CommentForm, PostForm, UserForm
-from .models import Comment, Post, Category
+from .models import Comment, Post
+from .pagination import KeysetPaginator
+from .read_models import post_rows, to_post_rows
+from .routers import read_from_replica
+from .search import search_posts
+from .stats import get_author_stats
+from .writer import run_serialized, write_view
 
 
 def sort_posts(objects):
     return objects.order_by(*Post._meta.ordering)
 
 
+def get_page(request, posts, count=None):
+    if settings.BLOG_FEED_READ_MODELS:
+        # Только поля карточки, без экземпляров моделей
+        posts = post_rows(posts)
+    # Курсорная пагинация; ?page= оставлен для старых ссылок
+    if settings.POSTS_PAGINATION == 'cursor' and 'page' not in request.GET:
+        paginator = KeysetPaginator(posts, settings.POSTS_PER_PAGE)
+        page = paginator.get_page(request.GET.get('cursor'), request.GET)
+    else:
+        paginator = Paginator(posts, settings.POSTS_PER_PAGE)
+        if count is not None:
+            # Готовое число публикаций вместо COUNT(*)
+            paginator.count = count
+        page = paginator.get_page(request.GET.get('page'))
+    if settings.BLOG_FEED_READ_MODELS:
+        page.object_list = to_post_rows(page.object_list)
+    else:
+        # Категории и места из снимка вместо JOIN в запросе ленты
+        attach_catalog(page)
+    attach_post_cards(page)
+    return page
+
+
+@read_from_replica
+@conditional_page('index')
+@cache_anonymous_page('index')
 def index(request):
     template = 'blog/index.html'
     # Получение всех постов
     posts = sort_posts(
         Post.objects.select_related(
             'author'
-        ).select_related(
-            'category'
-        ).filter(
-            pub_date__lte=timezone.now(),
-            is_published=True,
-            category__is_published=True
-        ).annotate(
-            comment_count=Count('comment')
-        )
+        ).published()
     )
-    # Пагинация по 10 страниц
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    context = {'page_obj': paginator.get_page(page_number)}
+    # Пагинация по 10 постов
+    context = {'page_obj': get_page(request, posts)}
     return render(request, template, context)
 
 
+def get_visible_post(request, post_id):
+    post = get_object_or_404(Post.objects.select_related(
+        'author'
+    ).visible_to(request.user), pk=post_id)
+    attach_catalog([post])
+    return post
+
+
+def get_comments_page(request, post):
+    # Комментарии порциями по ключу (created_at, id)
+    comments = Comment.objects.select_related(
+        'author'
+    ).filter(
+        post__pk=post.pk
+    ).order_by('created_at', 'id')
+    paginator = KeysetPaginator(comments, settings.COMMENTS_PER_PAGE)
+    return paginator.get_page(request.GET.get('cursor'))
+
+
+def post_last_modified(request, post_id):
+    # Время изменения публикации и её последнего комментария, один запрос
+    stamps = Post.objects.filter(pk=post_id).annotate(
+        comments_updated_at=Max('comment__updated_at')
+    ).values_list('updated_at', 'comments_updated_at').first()
+    if stamps is None:
+        return None
+    return max(stamp for stamp in stamps if stamp is not None).timestamp()
+
+
+@read_from_replica
+@conditional_page('post:{post_id}', last_modified=post_last_modified)
+@cache_anonymous_page('post:{post_id}')
 def post_detail(request, post_id):
     template = 'blog/detail.html'
     # Получение поста
-    if request.user.is_authenticated:
-        post = get_object_or_404(Post.objects.select_related(
-            'author'
-        ).select_related(
-            'category'
-        ).filter(
-            Q(is_published=True)
-            & Q(pub_date__lte=timezone.now())
-            & Q(category__is_published=True)
-            | Q(author__username=request.user.username)
-        ), pk=post_id)
-    else:
-        post = get_object_or_404(Post.objects.select_related(
-            'author'
-        ).select_related(
-            'category'
-        ).filter(
-            Q(is_published=True)
-            & Q(pub_date__lte=timezone.now())
-            & Q(category__is_published=True)
-        ), pk=post_id)
+    post = get_visible_post(request, post_id)
     # Форма для отправки комментария
     form = CommentForm()
-    # Получение всех комментариев поста
-    comments = Comment.objects.select_related(
-        'author'
-    ).select_related(
-        'post'
-    ).filter(
-        post__pk=post.pk
-    )
+    # Первая порция комментариев, остальные подгружает post_comments
     context = {
         'post': post,
         'form': form,
-        'comments': comments,
+        'comments': get_comments_page(request, post),
+    }
+    return render(request, template, context)
+
+
+@read_from_replica
+@conditional_page('post:{post_id}', last_modified=post_last_modified)
+@cache_anonymous_page('post:{post_id}')
+def post_comments(request, post_id):
+    template = 'includes/comment_list.html'
+    post = get_visible_post(request, post_id)
+    context = {
+        'post': post,
+        'comments': get_comments_page(request, post),
     }
     return render(request, template, context)
 
 
+@read_from_replica
+@conditional_page('category:{category_slug}')
+@cache_anonymous_page('category:{category_slug}')
 def category_posts(request, category_slug):
     template = "blog/category.html"
     # Получение категории по её слагу
-    category = get_object_or_404(
-        Category.objects.filter(is_published=True),
-        slug=category_slug
-    )
+    category = get_published_category(category_slug)
     # Получение всех постов данной категории
     posts = sort_posts(
         Post.objects.select_related(
             'author'
-        ).select_related(
-            'category'
         ).filter(
-            category__slug=category_slug,
-            is_published=True,
-            pub_date__lte=timezone.now()
-        ).annotate(
-            comment_count=Count('comment')
+            category=category,
+            is_visible=True
         )
     )
-    # Пагинация по 10 страниц
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
+    # Пагинация по 10 постов
     context = {
-        'page_obj': paginator.get_page(page_number),
+        'page_obj': get_page(request, posts),
         'category': category,
     }
     return render(request, template, context)
 
 
+@read_from_replica
+@conditional_page('profile:{username}')
+@cache_anonymous_page('profile:{username}')
 def user_profile(request, username):
     template = 'blog/profile.html'
     # Получение информации о пользователе
     User = get_user_model()
     user = get_object_or_404(
-        User.objects,
+        User.objects.select_related('stats'),
         username=username
     )
+    stats = get_author_stats(user)
     # Получение информации о постах пользователя
     posts = sort_posts(
         Post.objects.select_related(
             'author'
-        ).select_related(
-            'category'
         ).filter(
-            author__username=username,
-        ).annotate(
-            comment_count=Count('comment')
+            author=user,
         )
     )
-    if request.user.is_authenticated and request.user.username != username:
-        posts = posts.filter(
-            pub_date__lte=timezone.now(),
-            is_published=True,
-            category__is_published=True
-        )
+    count = stats.total_posts
+    # Чужие и анонимные читатели видят только опубликованное
+    if request.user.username != username:
+        posts = posts.published()
+        count = stats.published_posts
     # Пагинация постов
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
     context = {
         'profile': user,
-        'page_obj': paginator.get_page(page_number),
+        'stats': stats,
+        'page_obj': get_page(request, posts, count),
     }
     return render(request, template, context)
 
 
+def search(request):
+    template = 'blog/search.html'
+    query = request.GET.get('q', '').strip()
+    # Поиск по заголовкам и текстам видимых публикаций, лучшие сверху
+    page_obj = search_posts(
+        query,
+        request.GET.get('cursor'),
+        settings.POSTS_PER_PAGE,
+        request.GET
+    )
+    attach_catalog(page_obj)
+    attach_post_cards(page_obj)
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, template, context)
+
+
+@require_safe
+def sitemap(request, name='index'):
+    # Файлы готовит команда build_sitemaps; serve отвечает 304 по
+    # If-Modified-Since
+    return serve(request, f'{name}.xml', document_root=settings.SITEMAP_ROOT)
+
+
+@staff_member_required
+@require_safe
+def export(request, dataset):
+    # Выгрузка для аналитики: строки уходят клиенту по мере чтения из БД
+    export_format = request.GET.get('format', 'jsonl')
+    if dataset not in DATASETS or export_format not in FORMATS:
+        return HttpResponseBadRequest('Unknown dataset or format.')
+    since = request.GET.get('since')
+    if since:
+        try:
+            since = parse_since(since)
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+    compress = request.GET.get('gzip') == '1'
+    response = StreamingHttpResponse(
+        stream_export(dataset, export_format, since or None,
+                      compress=compress),
+        content_type=(
+            'application/gzip' if compress else CONTENT_TYPES[export_format]
+        )
+    )
+    filename = export_filename(dataset, export_format, compress)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 @login_required
+@write_view
 def edit_profile(request):
     template = 'blog/user.html'
     # Получение информации о пользователе
@@ -160,12 +256,13 @@ def edit_profile(request):
     )
     context = {'form': form}
     if request.method == 'POST':
-        form.save()
+        run_serialized(form.save)
         return redirect('blog:profile', username=request.user.username)
     return render(request, template, context)
 
 
 @login_required
+@write_view
 def create_post(request):
     template = 'blog/create.html'
     # Создание/валидация формы
@@ -178,12 +275,13 @@ def create_post(request):
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        run_serialized(post.save)
         return redirect('blog:profile', username=request.user.username)
     return render(request, template, context)
 
 
 @login_required
+@write_view
 def edit_post(request, post_id):
     template = 'blog/create.html'
     # Получение поста и сравнивание его автора с пользователем
@@ -201,12 +299,13 @@ def edit_post(request, post_id):
     )
     context = {'form': form}
     if form.is_valid():
-        form.save()
+        run_serialized(form.save)
         return redirect('blog:post_detail', post_id=post_id)
     return render(request, template, context)
 
 
 @login_required
+@write_view
 def add_comment(request, post_id):
     form = CommentForm(request.POST or None)
     if form.is_valid():
@@ -214,11 +313,12 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        run_serialized(comment.save)
     return redirect('blog:post_detail', post_id=post_id)
 
 
 @login_required
+@write_view
 def edit_comment(request, post_id, comment_id):
     template = 'blog/comment.html'
     post = get_object_or_404(Post.objects, pk=post_id)
@@ -235,12 +335,13 @@ def edit_comment(request, post_id, comment_id):
         'comment': comment,
     }
     if form.is_valid():
-        form.save()
+        run_serialized(form.save)
         return redirect('blog:post_detail', post_id=post_id)
     return render(request, template, context)
 
 
 @login_required
+@write_view
 def delete_post(request, post_id):
     template = 'blog/create.html'
     post = get_object_or_404(Post.objects.filter(
@@ -249,12 +350,13 @@ def delete_post(request, post_id):
     form = PostForm(instance=post)
     context = {'form': form}
     if request.method == 'POST':
-        post.delete()
+        run_serialized(post.delete)
         return redirect('blog:profile', username=request.user.username)
     return render(request, template, context)
 
 
 @login_required
+@write_view
 def delete_comment(request, post_id, comment_id):
     template = 'blog/comment.html'
     post = get_object_or_404(Post.objects, pk=post_id)
@@ -266,6 +368,6 @@ def delete_comment(request, post_id, comment_id):
         'comment': comment,
     }
     if request.method == 'POST':
-        comment.delete()
+        run_serialized(comment.delete)
         return redirect('blog:post_detail', post_id=post_id)
     return render(request, template, context)
@@ -0,0 +1,152 @@
+"""Последовательная запись в базу данных через один поток процесса.
+
+SQLite допускает одного писателя: одновременные POST-запросы потоков
+веб-сервера ждут блокировку и получают «database is locked». При
+BLOG_WRITE_QUEUE представления передают в run_serialized только сами
+записи (form.save, post.delete): они выполняются по очереди в
+отдельном потоке со своим соединением, а между процессами — под
+файловой блокировкой BLOG_WRITE_LOCK_FILE. Проверка формы, разбор
+загруженных файлов и рендер шаблона остаются в потоке запроса.
+
+Очередь ограничена (BLOG_WRITE_QUEUE_SIZE): при переполнении или
+ожидании очереди и блокировки дольше BLOG_WRITE_TIMEOUT (в сумме)
+представление с write_view отвечает 503 сразу, а запрос не копится
+в очереди.
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.http import HttpResponse
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: только очередь внутри процесса
+    fcntl = None
+
+LOCK_POLL_INTERVAL = 0.005
+
+_executor = None
+_slots = None
+_lock_file = None
+_executor_lock = threading.Lock()
+_state = threading.local()
+
+
+class WriteUnavailable(Exception):
+    pass
+
+
+class WriteQueueFull(WriteUnavailable):
+    pass
+
+
+class WriteTimeout(WriteUnavailable):
+    pass
+
+
+def get_executor():
+    global _executor, _slots
+    with _executor_lock:
+        if _executor is None:
+            _slots = threading.BoundedSemaphore(
+                settings.BLOG_WRITE_QUEUE_SIZE
+            )
+            _executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='blog-writer'
+            )
+    return _executor, _slots
+
+
+@contextmanager
+def process_lock(timeout):
+    """Файловая блокировка: пишет один процесс из всех на сервере."""
+    global _lock_file
+    if fcntl is None or not settings.BLOG_WRITE_LOCK_FILE:
+        yield
+        return
+    if _lock_file is None:
+        # Открывается один раз: блокировку берёт только поток записи
+        _lock_file = open(settings.BLOG_WRITE_LOCK_FILE, 'a')
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fcntl.flock(_lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            break
+        except BlockingIOError:
+            if time.monotonic() > deadline:
+                raise WriteTimeout('Write lock is held by another process.')
+            time.sleep(LOCK_POLL_INTERVAL)
+    try:
+        yield
+    finally:
+        fcntl.flock(_lock_file, fcntl.LOCK_UN)
+
+
+def write_job(deadline, func, args, kwargs):
+    _state.active = True
+    # Как в начале и конце запроса: CONN_MAX_AGE и проверка соединения
+    close_old_connections()
+    try:
+        # Блокировке остаётся то, что не ушло на ожидание в очереди
+        with process_lock(deadline - time.monotonic()):
+            with transaction.atomic():
+                return func(*args, **kwargs)
+    finally:
+        _state.active = False
+        close_old_connections()
+
+
+def run_serialized(func, *args, **kwargs):
+    """Выполняет func в потоке записи и возвращает её результат.
+
+    Исключения func пробрасываются вызывающему. WriteQueueFull и
+    WriteTimeout означают, что запись не выполнялась.
+    """
+    if not settings.BLOG_WRITE_QUEUE or getattr(_state, 'active', False):
+        return func(*args, **kwargs)
+    executor, slots = get_executor()
+    if not slots.acquire(blocking=False):
+        raise WriteQueueFull('Write queue is full.')
+    # Общий срок на очередь и файловую блокировку
+    deadline = time.monotonic() + settings.BLOG_WRITE_TIMEOUT
+    # Контекст запроса (язык, учёт запросов) переносится в поток записи
+    context = contextvars.copy_context()
+    try:
+        future = executor.submit(
+            context.run, write_job, deadline, func, args, kwargs
+        )
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda future: slots.release())
+    try:
+        return future.result(timeout=deadline - time.monotonic())
+    except FutureTimeoutError:
+        if future.cancel():
+            raise WriteTimeout('Write queue timeout.')
+    # Запись уже началась: её результат важнее таймаута
+    return future.result()
+
+
+def write_view(view):
+    """Ответ 503, если запись представления не попала в поток записи."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except WriteUnavailable:
+            response = HttpResponse(
+                'Сервер перегружен, повторите попытку позже.',
+                status=503, content_type='text/plain; charset=utf-8'
+            )
+            response['Retry-After'] = '1'
+            return response
+    return wrapper
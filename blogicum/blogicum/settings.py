@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,6 +48,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blog.query_budget.QueryBudgetMiddleware',
+    'blog.routers.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -81,10 +84,98 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Ожидание блокировки записи, с
+SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', '5'))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Соединение живёт между запросами; 0 — закрывать после каждого
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        # Проверка постоянного соединения перед запросом (blog.db)
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', '1') == '1',
+        'OPTIONS': {
+            'timeout': SQLITE_BUSY_TIMEOUT,
+        },
+    }
+}
+
+# Реплики для чтения (blog.routers): пути к копиям основной базы через
+# запятую. Локально это файлы SQLite, которые обновляет sync_replicas
+DATABASES.update({
+    f'replica{number}': {
+        **DATABASES['default'],
+        'NAME': path.strip(),
+        # В тестах реплика — та же тестовая база
+        'TEST': {'MIRROR': 'default'},
+    }
+    for number, path in enumerate(
+        filter(None, os.getenv('DB_REPLICAS', '').split(','))
+    )
+})
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['blog.routers.ReplicaRouter']
+# Сколько после своей записи пользователь читает из основной базы, с
+REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', '10'))
+# Период обновления реплик командой sync_replicas --loop, с
+REPLICA_SYNC_INTERVAL = float(os.getenv('DB_REPLICA_SYNC_INTERVAL', '5'))
+
+# PRAGMA для каждого нового соединения с SQLite (blog.db): WAL разводит
+# читателей и писателя, synchronous=NORMAL в режиме WAL не теряет
+# целостность при сбое процесса
+SQLITE_PRAGMAS = {
+    'busy_timeout': int(SQLITE_BUSY_TIMEOUT * 1000),
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'wal'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'normal'),
+    # Байты файла БД, отображаемые в память
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 ** 2))),
+    # Отрицательное значение — размер кэша страниц в КиБ
+    'cache_size': -int(os.getenv('SQLITE_CACHE_KIB', '65536')),
+    'temp_store': 'memory',
+}
+
+# Запись через один поток процесса (blog.writer); выключено по умолчанию
+BLOG_WRITE_QUEUE = os.getenv('BLOG_WRITE_QUEUE') == '1'
+# Ожидающих записей в процессе; сверх этого — ответ 503
+BLOG_WRITE_QUEUE_SIZE = int(os.getenv('BLOG_WRITE_QUEUE_SIZE', '64'))
+# Ожидание очереди и блокировки, с
+BLOG_WRITE_TIMEOUT = float(os.getenv('BLOG_WRITE_TIMEOUT', '10'))
+# Общая для процессов блокировка записи; пустая строка отключает
+BLOG_WRITE_LOCK_FILE = os.getenv(
+    'BLOG_WRITE_LOCK_FILE', str(BASE_DIR / 'db.sqlite3.lock')
+)
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+# Версии групп страниц и другие отметки блога живут в кэше.
+# locmem — память одного процесса: инвалидация в одном
+# воркере не видна остальным, поэтому он годится только для одного
+# процесса (runserver, тесты). Для нескольких воркеров нужен общий
+# кэш: CACHE_BACKEND=file|memcached|db или путь к классу бэкенда
+# (например, django_redis.cache.RedisCache), адрес — CACHE_LOCATION.
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+CACHE_LOCATIONS = {
+    'file': str(BASE_DIR / 'cache'),
+    'memcached': '127.0.0.1:11211',
+    # Таблицу создаёт manage.py createcachetable
+    'db': 'blog_cache',
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKEND),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', CACHE_LOCATIONS.get(CACHE_BACKEND, '')
+        ),
     }
 }
 
@@ -144,3 +235,68 @@ CSRF_FAILURE_VIEW = 'pages.views.csrf_failure'
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+
+
+# Blog
+
+# 'cursor' — пагинация лент по ключу (pub_date, id), 'page' — по номерам
+POSTS_PAGINATION = 'cursor'
+POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 50
+# Размер страницы списков JSON API
+API_PAGE_SIZE = 20
+# Число публикаций в RSS/Atom-лентах
+BLOG_FEED_ITEMS = 20
+
+# Карта сайта: файлы готовит команда build_sitemaps (по расписанию)
+SITEMAP_ROOT = MEDIA_ROOT / 'sitemaps'
+# Адрес сайта для ссылок в карте
+SITEMAP_BASE_URL = os.getenv('SITEMAP_BASE_URL', 'http://127.0.0.1:8000')
+# Диапазон первичных ключей на файл; в файле не больше 50 000 ссылок
+SITEMAP_SHARD_SIZE = 50000
+
+BLOG_CACHE_ALIAS = 'default'
+# Время жизни кэша страниц для анонимов, с; ограничивает устаревание
+# отложенных публикаций. 0 отключает кэш
+BLOG_PAGE_CACHE_TIMEOUT = 60
+# Карточки версионируются, поэтому могут жить долго
+BLOG_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+# Предельный возраст снимка категорий и мест, с: страховка для кэша,
+# не общего между процессами (locmem)
+BLOG_CATALOG_MAX_AGE = 300
+
+# Ленты из лёгких строк blog.read_models вместо экземпляров Post.
+# Выключено по умолчанию: в page_obj тогда не модели, а PostRow
+BLOG_FEED_READ_MODELS = os.getenv('BLOG_FEED_READ_MODELS') == '1'
+
+# Уменьшенные копии фото публикаций: ширина, px
+POST_IMAGE_SIZES = {
+    'card': 640,
+    'detail': 1280,
+}
+POST_IMAGE_QUALITY = 82
+POST_IMAGE_WORKERS = 2
+
+# Бюджеты SQL-запросов (blog.query_budget): доля проверяемых запросов,
+# лимиты по именам представлений и общий лимит
+QUERY_BUDGET_SAMPLE_RATE = float(
+    os.getenv('QUERY_BUDGET_SAMPLE_RATE', '1' if DEBUG else '0.01')
+)
+# Исключение вместо записи в лог (включается в тестах)
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT') == '1'
+QUERY_BUDGET_DEFAULT = 20
+# Запросы анонима; для вошедшего пользователя к бюджету прибавляется
+# QUERY_BUDGET_AUTH_QUERIES (сессия и пользователь)
+QUERY_BUDGET_AUTH_QUERIES = 2
+QUERY_BUDGETS = {
+    'blog:index': 5,
+    'blog:category_posts': 6,
+    'blog:profile': 6,
+    'blog:post_detail': 6,
+    'blog:post_comments': 6,
+    'blog:search': 6,
+}
+# Суммарное время SQL за запрос, с
+QUERY_BUDGET_TIME = 0.5
+# Сколько раз можно повторить один запрос или ленивую загрузку поля
+QUERY_BUDGET_REPEATS = 2
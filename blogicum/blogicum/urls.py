@@ -21,5 +21,6 @@ urlpatterns = [
     ),
     path('auth/', include('django.contrib.auth.urls')),
     path('pages/', include('pages.urls', namespace='pages')),
+    path('api/v1/', include('blog.api.urls', namespace='api')),
     path('', include('blog.urls', namespace='blog')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -33,6 +33,7 @@ class PostModelAdapter(StudentModelAdapter):
             "author",
             "category",
             "location",
+            "text_html",
             "refresh_from_db",
         ]
 
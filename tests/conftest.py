@@ -41,6 +41,40 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def finish_image_derivatives():
+    # Копии картинок строятся в пуле потоков после коммита: запись из
+    # него не должна попасть в следующий тест
+    yield
+    from blog import images
+    with images._executor_lock:
+        executor, images._executor = images._executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budget(request):
+    # С маркером query_budget каждый запрос тестового клиента
+    # проверяется бюджетом SQL-запросов
+    if request.node.get_closest_marker("query_budget") is None:
+        yield
+        return
+    with override_settings(
+        QUERY_BUDGET_SAMPLE_RATE=1, QUERY_BUDGET_STRICT=True
+    ):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def fresh_catalog():
+    # Откат транзакции теста не меняет версию каталога в кэше, поэтому
+    # снимок категорий и мест из прошлого теста сбрасывается
+    from blog.catalog import clear_catalog
+    clear_catalog()
+    yield
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -363,6 +397,7 @@ def cleanup(request):
                     filename.endswith(".jpg")
                     or filename.endswith(".gif")
                     or filename.endswith(".png")
+                    or filename.endswith(".webp")
             ):
                 file_path = os.path.join(root, filename)
                 if os.path.getmtime(file_path) >= start_time:
@@ -0,0 +1,73 @@
+import pytest
+from django.core.cache import cache
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_post_list_walks_visible_posts(
+        client, settings, many_posts_with_published_locations,
+        posts_with_unpublished_category, future_posts
+):
+    settings.API_PAGE_SIZE = 4
+    visible = type(many_posts_with_published_locations[0]).objects.published()
+    expected = list(visible.order_by("-pub_date", "-id").values_list(
+        "id", flat=True
+    ))
+    seen = []
+    url = "/api/v1/posts/"
+    while url:
+        data = client.get(url).json()
+        assert len(data["results"]) <= 4
+        seen += [post["id"] for post in data["results"]]
+        url = data["next"]
+    assert seen == expected, (
+        "Убедитесь, что API отдаёт по курсору все видимые публикации"
+        " в порядке ленты и только их."
+    )
+
+
+def test_sparse_fieldsets(client, post_with_published_location):
+    post = post_with_published_location
+    data = client.get(
+        f"/api/v1/posts/{post.id}/?fields=id,title,author"
+    ).json()
+    assert data == {
+        "id": post.id,
+        "title": post.title,
+        "author": post.author.username,
+    }, "Убедитесь, что параметр fields ограничивает набор полей ответа."
+    response = client.get("/api/v1/posts/?fields=id,password")
+    assert response.status_code == 400
+
+
+def test_hidden_post_and_comments(
+        client, user_client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    data = client.get(f"/api/v1/posts/{post.id}/comments/").json()
+    assert len(data["results"]) == 2
+    type(post).objects.filter(pk=post.pk).update(is_published=False)
+    assert client.get(f"/api/v1/posts/{post.id}/").status_code == 404, (
+        "Убедитесь, что API скрывает неопубликованные записи."
+    )
+    assert client.get(
+        f"/api/v1/posts/{post.id}/comments/"
+    ).status_code == 404
+    assert user_client.get(f"/api/v1/posts/{post.id}/").status_code == 200, (
+        "Убедитесь, что автор видит свою неопубликованную запись в API."
+    )
+
+
+def test_api_answers_not_modified(client, post_with_published_location):
+    response = client.get("/api/v1/posts/")
+    again = client.get("/api/v1/posts/", HTTP_IF_NONE_MATCH=response["ETag"])
+    assert again.status_code == 304
+    assert client.post("/api/v1/posts/").status_code == 405
@@ -0,0 +1,85 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import AuthorStats, Post
+
+pytestmark = [pytest.mark.django_db, pytest.mark.query_budget]
+
+
+def counters(user):
+    return AuthorStats.objects.values_list(
+        'published_posts', 'total_posts', 'comments_received',
+        'comments_written'
+    ).get(author=user)
+
+
+def test_signals_keep_author_stats(
+        user, another_user, another_user_client, post_with_published_location
+):
+    post = post_with_published_location
+    assert counters(user) == (1, 1, 0, 0)
+    another_user_client.post(f'/posts/{post.id}/comment/', {'text': 'Да'})
+    assert counters(user) == (1, 1, 1, 0), (
+        "Убедитесь, что комментарий увеличивает счётчик автора публикации."
+    )
+    assert counters(another_user) == (0, 0, 0, 1)
+    assert AuthorStats.objects.get(author=another_user).last_activity
+    post.refresh_from_db()
+    post.is_published = False
+    post.save()
+    assert counters(user) == (0, 1, 1, 0)
+    post.delete()
+    assert counters(user) == (0, 0, 0, 0), (
+        "Убедитесь, что удаление публикации уменьшает счётчики автора."
+    )
+    assert counters(another_user) == (0, 0, 0, 0)
+
+
+def test_category_unpublish_updates_stats(
+        user, published_category, post_with_published_location
+):
+    assert counters(user)[0] == 1
+    published_category.is_published = False
+    published_category.save()
+    assert counters(user) == (0, 1, 0, 0), (
+        "Убедитесь, что снятие категории с публикации пересчитывает "
+        "число видимых публикаций автора."
+    )
+
+
+def test_profile_paginates_by_stored_count(
+        user, client, settings, many_posts_with_published_locations
+):
+    settings.POSTS_PAGINATION = 'page'
+    url = f'/profile/{user.username}/?page=2'
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(url)
+    assert response.context['page_obj'].paginator.count == 20
+    assert not [
+        query for query in captured if 'COUNT(' in query['sql']
+    ], "Убедитесь, что профиль берёт число публикаций из статистики автора."
+    assert 'Публикаций: 20' in response.content.decode()
+
+
+def test_missing_stats_are_created_lazily(
+        user, client, settings, post_with_published_location
+):
+    # Разовый пересчёт строки не укладывается в бюджет профиля
+    settings.QUERY_BUDGET_STRICT = False
+    AuthorStats.objects.all().delete()
+    response = client.get(f'/profile/{user.username}/')
+    assert response.context['stats'].published_posts == 1, (
+        "Убедитесь, что статистика автора создаётся при первом показе профиля."
+    )
+    assert AuthorStats.objects.filter(author=user).exists()
+
+
+def test_recount_author_stats(user, post_with_published_location):
+    AuthorStats.objects.filter(author=user).update(total_posts=7)
+    with pytest.raises(Exception):
+        call_command('recount_author_stats', '--check')
+    call_command('recount_author_stats', '--batch-size', '1')
+    assert counters(user) == (1, Post.objects.count(), 0, 0)
+    call_command('recount_author_stats', '--check')
@@ -0,0 +1,48 @@
+import pytest
+from django.db.models import Count
+
+from blog.benchmark import build_scenarios, run_scenarios, seed_dataset
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_seed_dataset_skews_comments():
+    seed_dataset(posts=60, comments_per_post=5, seed=3)
+    assert Post.objects.count() == 60
+    counts = sorted(
+        Post.objects.annotate(total=Count('comment')).values_list(
+            'total', flat=True
+        ),
+        reverse=True,
+    )
+    assert counts[0] > 3 * counts[len(counts) // 2], (
+        "Убедитесь, что комментарии распределены неравномерно: у "
+        "немногих публикаций их заметно больше, чем у типичной."
+    )
+    assert list(
+        Post.objects.order_by('pk').values_list('comment_count', flat=True)
+    ) == [
+        Comment.objects.filter(post_id=pk).count()
+        for pk in Post.objects.order_by('pk').values_list('pk', flat=True)
+    ], "Убедитесь, что счётчики комментариев заполнены при засеве."
+
+
+def test_run_scenarios_reports_metrics():
+    seed_dataset(posts=30, comments_per_post=3, seed=5)
+    scenarios = build_scenarios(posts_per_page=10)
+    results = run_scenarios(scenarios, repeat=3, warmup=1)
+    names = {name for name, *_ in scenarios}
+    assert {result['name'] for result in results} == names
+    for result in results:
+        assert {'p50_ms', 'p95_ms', 'p99_ms', 'queries', 'bytes'} <= (
+            result.keys()
+        )
+        assert result['p50_ms'] <= result['p95_ms'] <= result['p99_ms']
+        assert all(status < 400 for status in result['status']), (
+            f"Сценарий {result['name']} ({result['user']}) вернул "
+            f"ошибку: {result['status']}."
+        )
+    users = {(result['name'], result['user']) for result in results}
+    assert ('add_comment', 'anonymous') not in users
+    assert ('index', 'authenticated') in users
@@ -0,0 +1,89 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+
+from blog import catalog
+from blog.catalog import get_catalog
+from blog.models import Category
+
+pytestmark = [pytest.mark.django_db, pytest.mark.query_budget]
+
+
+def catalog_queries(captured):
+    return [
+        query['sql'] for query in captured
+        if 'blog_category' in query['sql'] or 'blog_location' in query['sql']
+    ]
+
+
+def test_catalog_snapshot_follows_version(published_category):
+    first = get_catalog()
+    with CaptureQueriesContext(connection) as captured:
+        assert get_catalog() is first
+    assert not captured, (
+        "Убедитесь, что снимок каталога не перечитывается без изменений."
+    )
+    assert published_category.slug in first.published_slugs
+    published_category.is_published = False
+    published_category.save()
+    second = get_catalog()
+    assert second is not first
+    assert published_category.slug not in second.published_slugs, (
+        "Убедитесь, что снимок обновляется после изменения категории."
+    )
+    assert not second.categories[published_category.pk].is_published
+
+
+def test_pages_read_categories_from_snapshot(
+        user, user_client, many_posts_with_published_locations,
+        published_category
+):
+    category_url = f'/category/{published_category.slug}/'
+    # Первый запрос загружает снимок
+    user_client.get('/')
+    for url in ('/', category_url, f'/profile/{user.username}/'):
+        with CaptureQueriesContext(connection) as captured:
+            user_client.get(url)
+        assert not catalog_queries(captured), (
+            f"Убедитесь, что страница {url} берёт категории и места из "
+            "снимка, а не из базы."
+        )
+    post = many_posts_with_published_locations[0]
+    with CaptureQueriesContext(connection) as captured:
+        response = user_client.get(f'/posts/{post.id}/')
+    assert response.status_code == 200
+    assert not catalog_queries(captured)
+    assert post.location.name in response.content.decode()
+
+
+def test_catalog_snapshot_expires(
+        monkeypatch, settings, published_category
+):
+    first = get_catalog()
+    # Правка в другом процессе: версия в здешнем кэше не изменилась
+    QuerySet.update(
+        Category.objects.filter(pk=published_category.pk),
+        is_published=False
+    )
+    assert get_catalog() is first
+    clock = time.monotonic() + settings.BLOG_CATALOG_MAX_AGE + 1
+    monkeypatch.setattr(
+        catalog, 'time', SimpleNamespace(monotonic=lambda: clock)
+    )
+    assert published_category.slug not in get_catalog().published_slugs, (
+        "Убедитесь, что снимок каталога перечитывается, когда старше "
+        "BLOG_CATALOG_MAX_AGE."
+    )
+
+
+def test_deferred_fields_are_not_loaded_on_init(
+        django_assert_num_queries, user, published_category
+):
+    with django_assert_num_queries(2):
+        list(Category.objects.only('pk'))
+        list(get_user_model().objects.only('pk'))
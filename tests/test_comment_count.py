@@ -0,0 +1,54 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_comments(
+        mixer, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/comment/"
+    for i in range(3):
+        user_client.post(url, data={"text": f"Комментарий {i}"})
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        "Убедитесь, что счётчик комментариев публикации увеличивается"
+        " при добавлении комментария."
+    )
+    comment = post.comment_set.first()
+    comment.delete()
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что счётчик комментариев публикации уменьшается"
+        " при удалении комментария."
+    )
+
+
+def test_recount_comments_command(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    type(post).objects.filter(pk=post.pk).update(comment_count=7)
+    with pytest.raises(CommandError):
+        call_command("recount_comments", "--check")
+    call_command("recount_comments", "--batch-size", "1")
+    post.refresh_from_db()
+    assert post.comment_count == 2
+    call_command("recount_comments", "--check")
+
+
+def test_comment_count_never_goes_negative(
+        mixer, post_with_published_location
+):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post)
+    # Счётчик разошёлся с данными, например после loaddata
+    Post.objects.filter(pk=post.pk).update(comment_count=0)
+    comment.delete()
+    post.refresh_from_db()
+    assert post.comment_count == 0, (
+        "Убедитесь, что удаление комментария не уводит счётчик ниже нуля."
+    )
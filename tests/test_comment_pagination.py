@@ -0,0 +1,62 @@
+import re
+from datetime import timedelta
+from html import unescape
+
+import pytest
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db, pytest.mark.query_budget]
+
+NEXT_LINK = re.compile(r'href="([^"]+)" data-load-comments')
+
+
+def test_comments_are_loaded_in_batches(
+        mixer, client, settings, post_with_published_location
+):
+    settings.COMMENTS_PER_PAGE = 3
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 0
+    post = post_with_published_location
+    now = timezone.now()
+    comments = mixer.cycle(7).blend(
+        "blog.Comment", post=post,
+        text=(f"Комментарий номер {i}" for i in range(7)),
+    )
+    # Одинаковое время у части комментариев проверяет разбор по id
+    for i, comment in enumerate(comments):
+        type(comment).objects.filter(pk=comment.pk).update(
+            created_at=now + timedelta(minutes=i // 2)
+        )
+    response = client.get(f"/posts/{post.id}/")
+    content = response.content.decode()
+    assert len(response.context["comments"]) == 3, (
+        "Убедитесь, что на странице публикации выводится только первая"
+        " порция комментариев."
+    )
+    seen = [c.pk for c in response.context["comments"]]
+    while True:
+        match = NEXT_LINK.search(content)
+        if match is None:
+            break
+        response = client.get(unescape(match.group(1)))
+        assert response.status_code == 200
+        assert "<html" not in response.content.decode(), (
+            "Убедитесь, что следующая порция комментариев отдаётся"
+            " фрагментом без обёртки страницы."
+        )
+        content = response.content.decode()
+        seen += [c.pk for c in response.context["comments"]]
+    assert seen == [c.pk for c in comments], (
+        "Убедитесь, что комментарии подгружаются по порядку создания"
+        " без пропусков и повторов."
+    )
+
+
+def test_comment_fragment_hides_unpublished_post(
+        client, post_with_published_location
+):
+    post = post_with_published_location
+    type(post).objects.filter(pk=post.pk).update(is_published=False)
+    assert client.get(f"/posts/{post.id}/comments/").status_code == 404, (
+        "Убедитесь, что комментарии снятой с публикации записи недоступны"
+        " другим пользователям."
+    )
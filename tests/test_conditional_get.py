@@ -0,0 +1,99 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import cache
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def second_passed(monkeypatch):
+    # Секунда, в которую созданы данные теста, уже прошла
+    monkeypatch.setattr("blog.cache.time", SimpleNamespace(
+        time=lambda: time.time() + 2, time_ns=time.time_ns
+    ))
+
+
+@pytest.mark.parametrize("url", ["/", "/posts/{id}/", "/category/{slug}/"])
+def test_unchanged_page_answers_not_modified(
+        client, url, post_with_published_location, second_passed
+):
+    post = post_with_published_location
+    url = url.format(id=post.id, slug=post.category.slug)
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.has_header("ETag") and response.has_header(
+        "Last-Modified"
+    ), "Убедитесь, что страницы блога отдают заголовки ETag и Last-Modified."
+    again = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert again.status_code == 304, (
+        "Убедитесь, что неизменившаяся страница отвечает 304 Not Modified."
+    )
+    assert not again.content
+    again = client.get(
+        url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+    )
+    assert again.status_code == 304
+
+
+def test_changes_reset_validators(
+        client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    etag = client.get(url)["ETag"]
+    mixer.blend("blog.Comment", post=post)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Убедитесь, что новый комментарий меняет ETag страницы публикации."
+    )
+    post.title = "Другой заголовок"
+    post.save()
+    response = client.get("/", HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 200
+
+
+def test_validators_depend_on_user(
+        client, user_client, another_user_client, post_with_published_location
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    # Первый ответ выдаёт CSRF-cookie, от которой зависит ETag
+    user_client.get(url)
+    user_response = user_client.get(url)
+    assert "private" in user_response["Cache-Control"], (
+        "Убедитесь, что страницы вошедших пользователей помечены private."
+    )
+    assert user_client.get(
+        url, HTTP_IF_NONE_MATCH=user_response["ETag"]
+    ).status_code == 304
+    for other in (client, another_user_client):
+        assert other.get(
+            url, HTTP_IF_NONE_MATCH=user_response["ETag"]
+        ).status_code == 200, (
+            "Убедитесь, что ETag страницы учитывает пользователя."
+        )
+
+
+def test_same_second_change_is_not_hidden(
+        client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    response = client.get(url)
+    # Изменение в ту же секунду, что и ответ
+    mixer.blend("blog.Comment", post=post)
+    again = client.get(
+        url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+    )
+    assert again.status_code == 200, (
+        "Убедитесь, что изменение в ту же секунду, что и прошлый ответ,"
+        " не даёт устаревший 304 по If-Modified-Since."
+    )
@@ -0,0 +1,117 @@
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_export_command_formats(
+        tmp_path, mixer, many_posts_with_published_locations
+):
+    posts = many_posts_with_published_locations
+    jsonl = tmp_path / "posts.jsonl.gz"
+    call_command(
+        "export_data", "posts", "--gzip", "--chunk-size", "3",
+        "-o", str(jsonl)
+    )
+    with gzip.open(jsonl, "rt", encoding="utf-8") as stream:
+        rows = [json.loads(line) for line in stream]
+    assert sorted(row["id"] for row in rows) == sorted(
+        post.id for post in posts
+    ), "Убедитесь, что выгрузка содержит все публикации."
+    path = tmp_path / "comments.csv"
+    mixer.cycle(2).blend("blog.Comment", post=posts[0])
+    call_command("export_data", "comments", "--format", "csv",
+                 "-o", str(path))
+    with open(path, encoding="utf-8") as stream:
+        table = list(csv.DictReader(stream))
+    assert len(table) == 2
+    assert table[0]["post_id"] == str(posts[0].id)
+
+
+def test_export_since(tmp_path, many_posts_with_published_locations):
+    posts = many_posts_with_published_locations
+    old = timezone.now() - timedelta(days=3)
+    type(posts[0]).objects.exclude(pk=posts[0].pk).update(updated_at=old)
+    path = tmp_path / "posts.jsonl"
+    since = (old + timedelta(days=1)).isoformat()
+    call_command("export_data", "posts", "--since", since, "-o", str(path))
+    rows = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(row)["id"] for row in rows] == [posts[0].id], (
+        "Убедитесь, что --since выгружает только изменённые строки."
+    )
+
+
+def test_export_since_sees_denormalized_changes(
+        tmp_path, mixer, published_category,
+        many_posts_with_published_locations
+):
+    posts = many_posts_with_published_locations
+    Post = type(posts[0])
+    old = timezone.now() - timedelta(days=3)
+    Post.objects.update(updated_at=old)
+    since = (old + timedelta(days=1)).isoformat()
+    mixer.blend("blog.Comment", post=posts[0])
+    path = tmp_path / "posts.jsonl"
+    call_command("export_data", "posts", "--since", since, "-o", str(path))
+    rows = [json.loads(row) for row in path.read_text().splitlines()]
+    assert [(row["id"], row["comment_count"]) for row in rows] == [
+        (posts[0].id, 1)
+    ], "Убедитесь, что изменение счётчика комментариев попадает в выгрузку."
+    published_category.is_published = False
+    published_category.save()
+    call_command("export_data", "posts", "--since", since, "-o", str(path))
+    rows = [json.loads(row) for row in path.read_text().splitlines()]
+    assert len(rows) == len(posts) and not any(
+        row["is_visible"] for row in rows
+    ), "Убедитесь, что смена видимости публикаций попадает в выгрузку."
+
+
+def test_export_since_sees_bulk_updates(
+        tmp_path, mixer, many_posts_with_published_locations
+):
+    posts = many_posts_with_published_locations
+    Post = type(posts[0])
+    comment = mixer.blend("blog.Comment", post=posts[1])
+    old = timezone.now() - timedelta(days=3)
+    Post.objects.update(updated_at=old)
+    type(comment).objects.update(updated_at=old)
+    since = (old + timedelta(days=1)).isoformat()
+    Post.objects.filter(pk=posts[0].pk).update(title="Новый заголовок")
+    type(comment).objects.update(text="Новый текст")
+    path = tmp_path / "posts.jsonl"
+    call_command("export_data", "posts", "--since", since, "-o", str(path))
+    rows = [json.loads(row) for row in path.read_text().splitlines()]
+    assert [(row["id"], row["title"]) for row in rows] == [
+        (posts[0].id, "Новый заголовок")
+    ], "Убедитесь, что правка через QuerySet.update() попадает в выгрузку."
+    call_command(
+        "export_data", "comments", "--since", since, "-o", str(path)
+    )
+    rows = [json.loads(row) for row in path.read_text().splitlines()]
+    assert [row["text"] for row in rows] == ["Новый текст"]
+
+
+def test_export_view_is_staff_only(
+        client, user_client, admin_client, post_with_published_location
+):
+    url = "/export/posts/?format=csv"
+    assert client.get(url).status_code == 302
+    assert user_client.get(url).status_code == 302
+    response = admin_client.get(url)
+    assert response.status_code == 200
+    assert response.streaming, (
+        "Убедитесь, что выгрузка отдаётся через StreamingHttpResponse."
+    )
+    content = b"".join(response.streaming_content).decode()
+    table = list(csv.DictReader(io.StringIO(content)))
+    assert [row["title"] for row in table] == [
+        post_with_published_location.title
+    ]
+    assert admin_client.get("/export/users/").status_code == 400
@@ -0,0 +1,97 @@
+import time
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.http import parse_http_date
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_feeds_list_visible_posts(
+        client, post_with_published_location, posts_with_unpublished_category,
+        future_posts
+):
+    post = post_with_published_location
+    urls = [
+        "/feed/", "/feed/atom/",
+        f"/category/{post.category.slug}/feed/",
+        f"/category/{post.category.slug}/feed/atom/",
+        f"/profile/{post.author.username}/feed/",
+        f"/profile/{post.author.username}/feed/atom/",
+    ]
+    hidden = posts_with_unpublished_category + future_posts
+    for url in urls:
+        response = client.get(url)
+        assert response.status_code == 200, (
+            f"Убедитесь, что лента `{url}` доступна."
+        )
+        content = response.content.decode()
+        assert f"/posts/{post.id}/" in content
+        for hidden_post in hidden:
+            assert f"/posts/{hidden_post.id}/" not in content, (
+                "Убедитесь, что в ленты попадают только опубликованные"
+                " записи."
+            )
+
+
+def test_feed_is_cached_and_conditional(
+        client, django_assert_num_queries, post_with_published_location
+):
+    post = post_with_published_location
+    url = f"/category/{post.category.slug}/feed/atom/"
+    response = client.get(url)
+    with django_assert_num_queries(0):
+        again = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert again.status_code == 304, (
+        "Убедитесь, что повторный опрос неизменившейся ленты получает 304."
+    )
+    post.title = "Новый заголовок ленты"
+    post.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 200
+    assert "Новый заголовок ленты" in response.content.decode(), (
+        "Убедитесь, что изменение публикации сбрасывает кэш ленты."
+    )
+
+
+def test_unpublished_category_feed_is_not_found(
+        client, posts_with_unpublished_category
+):
+    category = posts_with_unpublished_category[0].category
+    assert client.get(f"/category/{category.slug}/feed/").status_code == 404
+
+
+def test_feed_last_modified_follows_hidden_posts(
+        client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    hidden = mixer.blend(
+        "blog.Post", author=post.author, category=post.category,
+        pub_date=post.pub_date, is_published=True
+    )
+    # Записи давно не менялись
+    QuerySet.update(
+        type(post).objects.all(),
+        updated_at=timezone.now() - timedelta(days=3)
+    )
+    url = f"/category/{post.category.slug}/feed/"
+    assert f"/posts/{hidden.id}/" in client.get(url).content.decode()
+    hidden_at = time.time()
+    hidden.is_published = False
+    hidden.save()
+    response = client.get(url)
+    assert f"/posts/{hidden.id}/" not in response.content.decode()
+    assert parse_http_date(response["Last-Modified"]) >= int(hidden_at), (
+        "Убедитесь, что Last-Modified ленты меняется, когда из неё "
+        "пропадает запись."
+    )
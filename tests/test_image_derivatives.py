@@ -0,0 +1,82 @@
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_card_falls_back_to_original_image(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    content = user_client.get("/").content.decode("utf-8")
+    assert f'src="{post.image.url}"' in content
+    assert "<picture>" not in content
+
+
+def test_card_uses_derivatives_when_ready(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    img_count = user_client.get("/").content.decode("utf-8").count("<img")
+    call_command("build_image_derivatives")
+    post.refresh_from_db()
+    variants = post.image_variants
+    assert variants["source"] == post.image.name
+    assert {"card", "detail"} <= variants.keys()
+    for response in (
+        user_client.get("/"),
+        user_client.get(f"/posts/{post.id}/"),
+    ):
+        content = response.content.decode("utf-8")
+        assert "<picture>" in content and ".webp" in content, (
+            "Убедитесь, что после обработки фото страницы используют"
+            " уменьшенные копии в формате WebP."
+        )
+        assert content.count("<img") == img_count
+
+
+def _variant_files(post):
+    return [
+        variant[extension]
+        for name, variant in post.image_variants.items() if name != "source"
+        for extension in ("jpg", "webp")
+    ]
+
+
+def test_stale_derivatives_are_deleted(
+        django_capture_on_commit_callbacks, post_with_published_location
+):
+    post = post_with_published_location
+    call_command("build_image_derivatives")
+    post.refresh_from_db()
+    old_files = _variant_files(post)
+    assert all(default_storage.exists(name) for name in old_files)
+    post.image = default_storage.save(
+        "posts_images/other.jpg", ContentFile(post.image.read())
+    )
+    post.save()
+    call_command("build_image_derivatives")
+    post.refresh_from_db()
+    assert not any(default_storage.exists(name) for name in old_files), (
+        "Убедитесь, что копии прежней картинки удаляются после замены."
+    )
+    new_files = _variant_files(post)
+    with django_capture_on_commit_callbacks(execute=True):
+        post.delete()
+    assert not any(default_storage.exists(name) for name in new_files), (
+        "Убедитесь, что копии картинки удаляются вместе с публикацией."
+    )
+
+
+def test_missing_size_is_not_ready(post_with_published_location):
+    post = post_with_published_location
+    call_command("build_image_derivatives")
+    post.refresh_from_db()
+    del post.image_variants["card"]
+    assert post.card_image is None, (
+        "Убедитесь, что размер, которого нет среди копий, считается"
+        " неготовым, а не вызывает ошибку."
+    )
+    assert post.detail_image is not None
@@ -0,0 +1,113 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from blog.importing import iter_fixture
+
+pytestmark = [pytest.mark.django_db]
+
+
+def make_fixture(user):
+    objects = [
+        {
+            "model": "blog.comment", "pk": 10 + i,
+            "fields": {
+                "post": 2, "author": user.pk, "text": f"Комментарий {i}",
+                "created_at": "2022-12-19T10:00:00Z",
+            },
+        }
+        for i in range(3)
+    ]
+    objects += [
+        {
+            "model": "blog.post", "pk": pk,
+            "fields": {
+                "title": f"Публикация {pk}", "text": "Текст публикации",
+                "pub_date": "2022-12-18T00:00:00Z", "is_published": True,
+                "created_at": "2022-12-18T23:06:18.993Z",
+                "updated_at": "2022-12-20T08:00:00Z",
+                "author": user.pk, "category": category, "location": 1,
+            },
+        }
+        for pk, category in ((1, 1), (2, 1), (3, 2))
+    ]
+    objects += [
+        {
+            "model": "blog.category", "pk": pk,
+            "fields": {
+                "title": f"Категория {pk}", "description": "Описание",
+                "slug": f"category-{pk}", "is_published": pk == 1,
+                "created_at": "2022-12-18T23:03:52.159Z",
+            },
+        }
+        for pk in (1, 2)
+    ]
+    objects.append({
+        "model": "blog.location", "pk": 1,
+        "fields": {
+            "name": "Остров", "is_published": True,
+            "created_at": "2022-12-18T23:03:52.159Z",
+        },
+    })
+    objects.append({"model": "auth.permission", "pk": 1, "fields": {}})
+    return objects
+
+
+def test_iter_fixture_reads_across_chunks(user):
+    objects = make_fixture(user)
+    stream = io.StringIO(json.dumps(objects, indent=2, ensure_ascii=False))
+    assert list(iter_fixture(stream, read_size=7)) == objects, (
+        "Убедитесь, что потоковый разбор фикстуры не зависит от размера"
+        " читаемых блоков."
+    )
+    with pytest.raises(ValueError):
+        list(iter_fixture(io.StringIO(json.dumps(objects)[:-40])))
+
+
+def test_import_fixture_command(user, tmp_path, PostModel):
+    path = tmp_path / "dump.json"
+    path.write_text(json.dumps(make_fixture(user)), encoding="utf-8")
+    call_command("import_fixture", str(path), "--batch-size", "2")
+    posts = PostModel.objects.order_by("pk")
+    assert posts.count() == 3
+    assert list(posts.filter(is_visible=True).values_list(
+        "pk", flat=True
+    )) == [1, 2], (
+        "Убедитесь, что после загрузки видимость публикаций рассчитана"
+        " с учётом категорий."
+    )
+    assert posts.get(pk=2).comment_count == 3
+    first = posts.get(pk=1)
+    assert (first.created_at.year, first.updated_at.day) == (2022, 20), (
+        "Убедитесь, что загрузка сохраняет даты из фикстуры."
+    )
+    with pytest.raises(CommandError):
+        call_command("import_fixture", str(path), "--models", "blog.nope")
+
+
+def test_iter_fixture_bounds_malformed_object(user):
+    text = '[{"model": "blog.location"}, {"bad": ' + " " * 500 + '"x"]'
+    stream = io.StringIO("  " + text + " " * 5000)
+    objects = iter_fixture(stream, read_size=64, max_object_size=256)
+    assert next(objects) == {"model": "blog.location"}
+    # Позиция битого объекта в файле, считая два пробела в начале
+    bad_at = 2 + text.index('{"bad"')
+    with pytest.raises(ValueError, match=f"at character {bad_at} "):
+        next(objects)
+    assert stream.tell() < 2000, (
+        "Убедитесь, что битый объект не дочитывается до конца файла."
+    )
+
+
+def test_import_fixture_reports_missing_authors(user, tmp_path):
+    objects = make_fixture(user)
+    for obj in objects:
+        if obj["model"] == "blog.post":
+            obj["fields"]["author"] = 9999
+    path = tmp_path / "dump.json"
+    path.write_text(json.dumps(objects), encoding="utf-8")
+    with pytest.raises(CommandError, match="author.*auth.user.*9999"):
+        call_command("import_fixture", str(path))
@@ -0,0 +1,94 @@
+import re
+from datetime import timedelta
+from html import unescape
+
+import pytest
+from django.utils import timezone
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db, pytest.mark.query_budget]
+
+
+def _get_cursor_query(content: str, label: str):
+    match = re.search(
+        r'href="\?([^"]*)">\s*' + re.escape(label), content
+    )
+    return unescape(match.group(1)) if match else None
+
+
+def test_keyset_pagination_walks_all_posts(
+        user_client, many_posts_with_published_locations
+):
+    posts = many_posts_with_published_locations
+    seen = []
+    query = ""
+    while True:
+        response = user_client.get(f"/?{query}")
+        page = response.context["page_obj"]
+        assert len(page) <= N_PER_PAGE
+        seen.extend(page)
+        query = _get_cursor_query(response.content.decode("utf-8"), ">>")
+        if not query:
+            break
+    assert sorted(p.id for p in seen) == sorted(p.id for p in posts), (
+        "Убедитесь, что курсорная пагинация проходит по всем публикациям"
+        " ленты без пропусков и повторов."
+    )
+    keys = [(p.pub_date, p.id) for p in seen]
+    assert keys == sorted(keys, reverse=True), (
+        "Убедитесь, что при курсорной пагинации публикации отсортированы"
+        " «от новых к старым»."
+    )
+
+
+def test_keyset_pagination_previous_page(
+        user_client, many_posts_with_published_locations
+):
+    first = user_client.get("/")
+    next_query = _get_cursor_query(first.content.decode("utf-8"), ">>")
+    second = user_client.get(f"/?{next_query}")
+    previous_query = _get_cursor_query(second.content.decode("utf-8"), "<<")
+    assert previous_query, (
+        "Убедитесь, что со второй страницы есть ссылка на предыдущую."
+    )
+    back = user_client.get(f"/?{previous_query}")
+    assert list(back.context["page_obj"]) == list(first.context["page_obj"])
+
+
+def test_keyset_pagination_bad_cursor(
+        user_client, many_posts_with_published_locations
+):
+    response = user_client.get("/?cursor=not-a-cursor")
+    assert response.status_code == 200
+    assert len(response.context["page_obj"]) == N_PER_PAGE
+
+
+def test_keyset_pagination_same_millisecond(
+        user_client, mixer, user, published_category
+):
+    # Время публикаций отличается только микросекундами
+    moment = timezone.now().replace(microsecond=500000) - timedelta(days=1)
+    posts = mixer.cycle(N_PER_PAGE * 2).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=mixer.sequence(
+            *(moment + timedelta(microseconds=i)
+              for i in range(N_PER_PAGE * 2))
+        ),
+    )
+    seen = []
+    query = ""
+    while True:
+        response = user_client.get(f"/?{query}")
+        seen.extend(response.context["page_obj"])
+        query = _get_cursor_query(response.content.decode("utf-8"), ">>")
+        if not query:
+            break
+    assert sorted(p.id for p in seen) == sorted(p.id for p in posts), (
+        "Убедитесь, что курсор хранит время с точностью до микросекунд:"
+        " публикации из одной миллисекунды не должны пропадать или"
+        " повторяться."
+    )
@@ -0,0 +1,90 @@
+import json
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+DB_JSON = Path(__file__).resolve().parent.parent / "db.json"
+
+
+def test_loaddata_db_json():
+    call_command("loaddata", str(DB_JSON), verbosity=0)
+    post = Post.objects.get(pk=1)
+    assert post.updated_at == post.created_at, (
+        "Убедитесь, что фикстура db.json загружается командой loaddata,"
+        " а updated_at без значения берётся из created_at."
+    )
+    assert Post.objects.published().exists(), (
+        "Убедитесь, что после loaddata видимость публикаций пересчитывается."
+    )
+    assert not Post.objects.filter(text_html="").exists(), (
+        "Убедитесь, что после loaddata заполняются text_html и excerpt."
+    )
+    # Статистика авторов и счётчики сходятся без отдельных команд
+    call_command("recount_author_stats", "--check", verbosity=0)
+    call_command("recount_comments", "--check", verbosity=0)
+
+
+@pytest.mark.parametrize("category_published", [True, False])
+def test_loaddata_post_before_category(tmp_path, user, category_published):
+    fixture = tmp_path / "posts.json"
+    fixture.write_text(json.dumps([
+        {
+            "model": "blog.post",
+            "pk": 1,
+            "fields": {
+                "title": "Пост",
+                "text": "Текст",
+                "pub_date": "2022-12-19T08:00:00Z",
+                "author": user.pk,
+                "category": 1,
+                "is_published": True,
+                "created_at": "2022-12-19T08:00:00Z",
+            },
+        },
+        {
+            "model": "blog.category",
+            "pk": 1,
+            "fields": {
+                "title": "Категория",
+                "description": "Описание",
+                "slug": "category",
+                "is_published": category_published,
+                "created_at": "2022-12-19T08:00:00Z",
+            },
+        },
+    ]), encoding="utf-8")
+    call_command("loaddata", str(fixture), verbosity=0)
+    visible = Post.objects.published().filter(pk=1).exists()
+    assert visible == category_published, (
+        "Убедитесь, что видимость публикации пересчитывается, когда её "
+        "категория загружается после неё."
+    )
+
+
+def test_loaddata_comment_without_updated_at(
+        tmp_path, post_with_published_location
+):
+    fixture = tmp_path / "comments.json"
+    fixture.write_text(json.dumps([{
+        "model": "blog.comment", "pk": 1,
+        "fields": {
+            "post": post_with_published_location.pk,
+            "author": post_with_published_location.author_id,
+            "text": "Комментарий", "created_at": "2022-12-19T10:00:00Z",
+        },
+    }]))
+    call_command("loaddata", str(fixture), verbosity=0)
+    comment = Comment.objects.get(pk=1)
+    assert comment.updated_at == comment.created_at, (
+        "Убедитесь, что комментарий из фикстуры без updated_at загружается."
+    )
+    assert comment.text_html == "Комментарий"
+    post_with_published_location.refresh_from_db()
+    assert post_with_published_location.comment_count == 1, (
+        "Убедитесь, что после loaddata счётчик комментариев пересчитывается."
+    )
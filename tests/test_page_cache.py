@@ -0,0 +1,122 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.template.defaultfilters import date
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db, pytest.mark.query_budget]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_anonymous_page_is_cached(
+        client, django_assert_num_queries, post_with_published_location
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    first = client.get(url)
+    assert first.status_code == 200
+    with django_assert_num_queries(0):
+        second = client.get(url)
+    assert second.content == first.content, (
+        "Убедитесь, что повторный анонимный запрос отдаётся из кэша."
+    )
+
+
+def test_page_cache_invalidated_by_post_change(
+        client, post_with_published_location
+):
+    post = post_with_published_location
+    assert post.title in client.get("/").content.decode("utf-8")
+    post.title = "Совершенно новый заголовок"
+    post.save()
+    content = client.get("/").content.decode("utf-8")
+    assert "Совершенно новый заголовок" in content, (
+        "Убедитесь, что изменение публикации сбрасывает кэш страниц."
+    )
+
+
+def test_page_cache_invalidated_by_comment(
+        mixer, client, post_with_published_location
+):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    client.get(url)
+    mixer.blend("blog.Comment", post=post, text="Свежий комментарий")
+    assert "Свежий комментарий" in client.get(url).content.decode("utf-8")
+
+
+def test_bulk_update_refreshes_cached_cards(
+        client, post_with_published_location
+):
+    post = post_with_published_location
+    client.get("/")
+    type(post).objects.filter(pk=post.pk).update(title="Заголовок из update")
+    assert "Заголовок из update" in client.get("/").content.decode(
+        "utf-8"
+    ), (
+        "Убедитесь, что QuerySet.update() сбрасывает кэш страниц и "
+        "карточек."
+    )
+    pub_date = timezone.now() - timedelta(days=400)
+    type(post).objects.filter(pk=post.pk).update(pub_date=pub_date)
+    shown = date(timezone.localtime(pub_date), "d E Y, H:i")
+    assert shown in client.get("/").content.decode("utf-8"), (
+        "Убедитесь, что карточка показывает дату из QuerySet.update()."
+    )
+
+
+def test_authenticated_pages_are_not_cached(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    user_client.get("/")
+    type(post).objects.filter(pk=post.pk).update(
+        title="Без сигналов", updated_at=timezone.now()
+    )
+    assert "Без сигналов" in user_client.get("/").content.decode("utf-8")
+
+
+def test_post_cards_fetched_with_one_cache_read(
+        user_client, many_posts_with_published_locations
+):
+    user_client.get("/")
+    calls = []
+    original = cache.get_many
+
+    def get_many(keys, *args, **kwargs):
+        calls.append(list(keys))
+        return original(keys, *args, **kwargs)
+
+    cache.get_many = get_many
+    try:
+        response = user_client.get("/")
+    finally:
+        del cache.get_many
+    card_reads = [keys for keys in calls if keys[0].startswith("blog:card:")]
+    assert len(card_reads) == 1 and len(card_reads[0]) == len(
+        response.context["page_obj"]
+    ), "Убедитесь, что карточки страницы читаются из кэша одним запросом."
+
+
+def test_shared_cache_invalidates_other_processes(tmp_path, settings):
+    from django.core.cache.backends.filebased import FileBasedCache
+
+    from blog.cache import get_versions, invalidate
+
+    settings.CACHES = {'default': {
+        'BACKEND': settings.CACHE_BACKENDS['file'],
+        'LOCATION': str(tmp_path),
+    }}
+    # Отдельный экземпляр бэкенда — как кэш другого воркера
+    other = FileBasedCache(str(tmp_path), {})
+    version, = get_versions(['index'])
+    invalidate('index')
+    assert other.get('blog:version:index') != version, (
+        "Убедитесь, что при общем кэше инвалидация видна другим процессам."
+    )
@@ -0,0 +1,79 @@
+import logging
+
+import pytest
+from django.core.cache import cache
+
+from blog.query_budget import QueryBudgetExceeded, QueryStats, current_stats
+
+pytestmark = [pytest.mark.django_db, pytest.mark.query_budget]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_budget_violation_raises_in_strict_mode(
+        client, settings, post_with_published_location
+):
+    settings.QUERY_BUDGETS = {"blog:index": 0}
+    with pytest.raises(QueryBudgetExceeded, match="blog:index"):
+        client.get("/")
+
+
+def test_budget_violation_is_logged(
+        client, settings, caplog, post_with_published_location
+):
+    settings.QUERY_BUDGET_STRICT = False
+    settings.QUERY_BUDGETS = {"blog:index": 0}
+    with caplog.at_level(logging.WARNING, logger="blog.queries"):
+        assert client.get("/").status_code == 200
+    assert "blog:index" in caplog.text, (
+        "Убедитесь, что превышение бюджета запросов записывается в лог."
+    )
+
+
+def test_sampling_skips_requests(
+        client, settings, post_with_published_location
+):
+    settings.QUERY_BUDGETS = {"blog:index": 0}
+    settings.QUERY_BUDGET_SAMPLE_RATE = 0
+    assert client.get("/").status_code == 200
+
+
+def test_lazy_loads_are_detected(
+        settings, many_posts_with_published_locations, PostModel
+):
+    stats = QueryStats()
+    token = current_stats.set(stats)
+    try:
+        for post in PostModel.objects.all():
+            post.location
+        for post in PostModel.objects.select_related("location"):
+            post.location
+    finally:
+        current_stats.reset(token)
+    posts = len(many_posts_with_published_locations)
+    assert stats.lazy_loads == {"blog.Post.location": posts}, (
+        "Убедитесь, что ленивые загрузки внешних ключей учитываются."
+    )
+    assert any("lazy load of blog.Post.location" in problem
+               for problem in stats.problems("blog:index"))
+
+
+def test_authenticated_requests_get_session_allowance(
+        user_client, settings, post_with_published_location
+):
+    # Первый запрос загружает снимок каталога
+    user_client.get("/")
+    # Анонимная лента — один запрос публикаций
+    settings.QUERY_BUDGETS = {"blog:index": 1}
+    assert user_client.get("/").status_code == 200, (
+        "Убедитесь, что вошедшему пользователю к бюджету прибавляются"
+        " запросы сессии и пользователя."
+    )
+    settings.QUERY_BUDGET_AUTH_QUERIES = 0
+    with pytest.raises(QueryBudgetExceeded, match="3 queries"):
+        user_client.get("/")
@@ -0,0 +1,41 @@
+import pytest
+from django.core.cache import cache
+
+from blog.benchmark import compare_feed_rows
+from blog.read_models import PostRow
+
+pytestmark = [pytest.mark.django_db, pytest.mark.query_budget]
+
+
+def test_feed_renders_same_cards_from_rows(
+        settings, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    post.text = ' '.join(['слово'] * 500)
+    post.save()
+    cache.clear()
+    settings.BLOG_FEED_READ_MODELS = False
+    expected = user_client.get('/').content.decode()
+    cache.clear()
+    settings.BLOG_FEED_READ_MODELS = True
+    response = user_client.get('/')
+    rows = list(response.context['page_obj'])
+    assert rows and all(isinstance(row, PostRow) for row in rows), (
+        "Убедитесь, что при BLOG_FEED_READ_MODELS лента строится из "
+        "PostRow."
+    )
+    assert not hasattr(rows[0], 'text'), (
+        "Убедитесь, что для ленты выбирается только отрывок текста."
+    )
+    assert response.content.decode() == expected, (
+        "Убедитесь, что карточки из PostRow совпадают с карточками "
+        "из моделей."
+    )
+
+
+def test_compare_feed_rows(many_posts_with_published_locations):
+    results = compare_feed_rows(per_page=10, repeat=2)
+    assert set(results) == {'models', 'rows'}
+    assert results['rows']['retained_kib'] < (
+        results['models']['retained_kib']
+    )
@@ -0,0 +1,92 @@
+import pytest
+from django.core.management import call_command
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+TEXT = '<b>Первая</b> строка\nвторая ' + ' '.join(['слово'] * 20)
+
+
+def test_post_text_is_rendered_on_save(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    post.text = TEXT
+    post.save(update_fields=['text'])
+    post.refresh_from_db()
+    assert post.text_html.startswith(
+        '&lt;b&gt;Первая&lt;/b&gt; строка<br>вторая'
+    ), "Убедитесь, что текст публикации хранится экранированным HTML."
+    assert post.excerpt.endswith(' …') and len(post.excerpt.split()) == 11
+    response = user_client.get(f'/posts/{post.id}/')
+    assert post.text_html in response.content.decode()
+
+
+def test_comment_text_is_rendered_on_edit(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    user_client.post(f'/posts/{post.id}/comment/', {'text': 'a\nb'})
+    comment = Comment.objects.get(post=post)
+    assert comment.text_html == 'a<br>b'
+    user_client.post(
+        f'/posts/{post.id}/edit_comment/{comment.id}/', {'text': '<i>'}
+    )
+    comment.refresh_from_db()
+    assert comment.text_html == '&lt;i&gt;', (
+        "Убедитесь, что HTML комментария пересчитывается при правке."
+    )
+
+
+def test_render_texts_backfills(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.blend('blog.Comment', post=post, text='x\ny')
+    Post.objects.update(text_html='', excerpt='')
+    Comment.objects.update(text_html='')
+    call_command('render_texts', '--batch-size', '1')
+    post.refresh_from_db()
+    assert post.text_html and post.excerpt, (
+        "Убедитесь, что команда render_texts заполняет пустые поля."
+    )
+    assert Comment.objects.get().text_html == 'x<br>y'
+
+
+def test_update_renders_text(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.blend('blog.Comment', post=post, text='x')
+    Post.objects.filter(pk=post.pk).update(text='a\nb')
+    Comment.objects.update(text='c\nd')
+    post.refresh_from_db()
+    assert (post.text_html, post.excerpt) == ('a<br>b', 'a b'), (
+        "Убедитесь, что QuerySet.update(text=...) пересчитывает HTML и "
+        "отрывок публикации."
+    )
+    assert Comment.objects.get().text_html == 'c<br>d'
+
+
+def test_pages_fall_back_to_text(
+        client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.blend('blog.Comment', post=post, text='Первый')
+    # Выражение не отрендерить заранее: поля очищаются
+    Post.objects.update(text=Concat(Value('<i> '), F('title')))
+    Comment.objects.update(text=Value('Свежий\nкомментарий'))
+    post.refresh_from_db()
+    assert post.text_html == post.excerpt == ''
+    content = client.get(f'/posts/{post.id}/').content.decode()
+    assert post.text.replace('<i>', '&lt;i&gt;') in content, (
+        "Убедитесь, что страница публикации выводит текст, если HTML ещё "
+        "не посчитан."
+    )
+    assert 'Свежий<br>комментарий' in content
+    assert 'Свежий' in client.get(
+        f'/posts/{post.id}/comments/'
+    ).content.decode()
+    assert '&lt;i&gt;' in client.get('/').content.decode(), (
+        "Убедитесь, что карточка публикации выводит начало текста, если "
+        "отрывок ещё не посчитан."
+    )
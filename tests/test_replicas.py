@@ -0,0 +1,145 @@
+import sqlite3
+import time
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from blog import views
+from blog.db import copy_database
+from blog.models import Post
+from blog.routers import (
+    PIN_COOKIE, ReplicaRouter, mark_synced, read_from_replica,
+    replica_reads
+)
+
+
+def test_router_reads_blog_models_from_replica(settings):
+    settings.DATABASE_REPLICAS = ['replica0']
+    router = ReplicaRouter()
+    assert router.db_for_read(Post) is None, (
+        "Убедитесь, что вне страниц с read_from_replica чтение идёт из "
+        "основной базы."
+    )
+    token = replica_reads.set('replica0')
+    try:
+        assert router.db_for_read(Post) == 'replica0'
+        assert router.db_for_read(get_user_model()) is None, (
+            "Убедитесь, что пользователи и сессии читаются из основной "
+            "базы."
+        )
+    finally:
+        replica_reads.reset(token)
+    assert router.db_for_write(Post) == 'default'
+    assert router.allow_migrate('replica0', 'blog') is False
+
+
+def test_pinned_browser_reads_from_primary(settings):
+    settings.DATABASE_REPLICAS = ['replica0']
+    view = read_from_replica(
+        lambda request: HttpResponse(str(replica_reads.get()))
+    )
+    factory = RequestFactory()
+    assert view(factory.get('/')).content == b'replica0'
+    assert view(factory.post('/')).content == b'None'
+    pinned = factory.get('/')
+    pinned.COOKIES[PIN_COOKIE] = str(time.time() + 60)
+    assert view(pinned).content == b'None', (
+        "Убедитесь, что после своей записи пользователь читает из "
+        "основной базы."
+    )
+    expired = factory.get('/')
+    expired.COOKIES[PIN_COOKIE] = str(time.time() - 1)
+    assert view(expired).content == b'replica0'
+
+
+def test_one_replica_per_request(settings):
+    settings.DATABASE_REPLICAS = [f'replica{number}' for number in range(8)]
+    router = ReplicaRouter()
+    view = read_from_replica(lambda request: HttpResponse(' '.join(
+        router.db_for_read(Post) for _ in range(20)
+    )))
+    request = RequestFactory().get('/')
+    for _ in range(5):
+        assert len(set(view(request).content.split())) == 1, (
+            "Убедитесь, что запрос читает из одной реплики."
+        )
+
+
+@pytest.mark.django_db
+def test_write_sets_pin_cookie(
+        settings, user_client, post_with_published_location
+):
+    settings.DATABASE_REPLICAS = ['default']
+    response = user_client.post(
+        f'/posts/{post_with_published_location.id}/comment/',
+        {'text': 'Свежий комментарий'}
+    )
+    assert PIN_COOKIE in response.cookies
+    assert response.cookies[PIN_COOKIE]['max-age'] == (
+        settings.REPLICA_PIN_SECONDS
+    )
+    response = user_client.get(f'/posts/{post_with_published_location.id}/')
+    assert 'Свежий комментарий' in response.content.decode()
+
+
+def test_copy_database(tmp_path):
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    db = sqlite3.connect(primary, isolation_level=None)
+    db.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+    db.execute('INSERT INTO item VALUES (1)')
+    copy_database(str(primary), str(replica))
+    reader = sqlite3.connect(replica)
+    assert reader.execute('SELECT count(*) FROM item').fetchone() == (1,)
+    db.execute('INSERT INTO item VALUES (2)')
+    copy_database(str(primary), str(replica))
+    assert reader.execute('SELECT count(*) FROM item').fetchone() == (2,), (
+        "Убедитесь, что открытое соединение с репликой видит обновление."
+    )
+    reader.close()
+    db.close()
+
+
+@pytest.fixture
+def page_reads(monkeypatch):
+    reads = []
+    get_visible_post = views.get_visible_post
+
+    def spy(request, post_id):
+        reads.append(replica_reads.get())
+        return get_visible_post(request, post_id)
+
+    monkeypatch.setattr(views, 'get_visible_post', spy)
+    return reads
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', ['/posts/{}/', '/posts/{}/comments/'])
+def test_post_pages_read_from_replica(
+        settings, client, page_reads, post_with_published_location, url
+):
+    settings.DATABASE_REPLICAS = ['default']
+    mark_synced('default', time.time())
+    client.get(url.format(post_with_published_location.id))
+    assert page_reads == ['default'], (
+        "Убедитесь, что публикация и порции её комментариев читаются "
+        "с реплики."
+    )
+
+
+@pytest.mark.django_db
+def test_stale_replica_is_not_cached(
+        settings, client, page_reads, post_with_published_location
+):
+    post = post_with_published_location
+    settings.DATABASE_REPLICAS = ['default']
+    mark_synced('default', time.time())
+    post.title = 'Заголовок новее реплики'
+    post.save()
+    response = client.get(f'/posts/{post.id}/')
+    assert 'Заголовок новее реплики' in response.content.decode()
+    assert page_reads == [None], (
+        "Убедитесь, что страницу, изменённую после обновления реплики, "
+        "читают и кэшируют из основной базы."
+    )
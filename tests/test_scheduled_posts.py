@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_future_post_is_not_visible(future_posts):
+    for post in future_posts:
+        post.refresh_from_db()
+        assert not post.is_visible, (
+            "Убедитесь, что отложенная публикация не видна до даты"
+            " публикации."
+        )
+
+
+def test_publish_scheduled_opens_due_posts(
+        client, mixer, user, published_category
+):
+    post = mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        pub_date=timezone.now() + timedelta(seconds=1),
+    )
+    assert post.title not in client.get("/").content.decode("utf-8")
+    # Дата наступила, но публикацию ещё никто не открыл
+    type(post).objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(seconds=1)
+    )
+    type(post).objects.filter(pk=post.pk).update(is_visible=False)
+    call_command("publish_scheduled", "--warm")
+    post.refresh_from_db()
+    assert post.is_visible
+    assert post.title in client.get("/").content.decode("utf-8"), (
+        "Убедитесь, что после наступления даты публикации пост появляется"
+        " в ленте, в том числе закэшированной."
+    )
@@ -0,0 +1,112 @@
+import re
+from html import unescape
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import QuerySet
+
+from blog.search import FTS_TABLE, rebuild_index
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _search(client, query):
+    response = client.get("/search/", {"q": query})
+    assert response.status_code == 200
+    return response
+
+
+def test_search_finds_visible_posts(
+        client, mixer, user, published_category
+):
+    found = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        title="Про котов", text="Кошки любят молоко"
+    )
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=False, title="Скрытые коты", text="Кошки"
+    )
+    posts = list(_search(client, "кошки").context["page_obj"])
+    assert posts == [found], (
+        "Убедитесь, что поиск находит только опубликованные посты."
+    )
+    assert list(_search(client, "моло").context["page_obj"]) == [found]
+
+
+def test_search_follows_post_changes(client, post_with_published_location):
+    post = post_with_published_location
+    post.text = "Необыкновенный жираф"
+    post.save()
+    assert list(_search(client, "жираф").context["page_obj"]) == [post]
+    post.delete()
+    assert not list(_search(client, "жираф").context["page_obj"])
+
+
+def test_search_keyset_pages(
+        client, mixer, user, published_category
+):
+    posts = mixer.cycle(25).blend(
+        "blog.Post", author=user, category=published_category,
+        text="Общий текст про лето"
+    )
+    seen = []
+    url = "/search/?q=лето"
+    while url:
+        response = client.get(url)
+        seen.extend(response.context["page_obj"])
+        match = re.search(
+            r'href="\?([^"]*)">\s*>>', response.content.decode("utf-8")
+        )
+        url = f"/search/?{unescape(match.group(1))}" if match else None
+    assert sorted(p.id for p in seen) == sorted(p.id for p in posts)
+
+
+def test_search_syntax_is_escaped(client):
+    assert not list(_search(client, 'AND "OR (').context["page_obj"])
+
+
+def test_rebuild_search_index(client, post_with_published_location):
+    post = post_with_published_location
+    # Правка в обход индекса, например прямо в базе
+    QuerySet.update(type(post).objects.filter(pk=post.pk), text="Сурикат")
+    assert not list(_search(client, "сурикат").context["page_obj"])
+    call_command("rebuild_search_index", "--batch-size", "1")
+    assert list(_search(client, "сурикат").context["page_obj"]) == [post]
+
+
+def test_update_reindexes_posts(client, post_with_published_location):
+    post = post_with_published_location
+    type(post).objects.filter(pk=post.pk).update(title="Сурикат")
+    assert list(_search(client, "сурикат").context["page_obj"]) == [post], (
+        "Убедитесь, что QuerySet.update() обновляет индекс поиска."
+    )
+
+
+def test_search_works_during_rebuild(
+        client, mixer, user, published_category
+):
+    posts = mixer.cycle(2).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, text="Выхухоль"
+    )
+    with connection.cursor() as cursor:
+        # Строка публикации, которой уже нет
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, text) "
+            "VALUES (100000, 'Выхухоль', 'Выхухоль')"
+        )
+    rebuild = rebuild_index(batch_size=1)
+    next(rebuild)
+    found = list(_search(client, "выхухоль").context["page_obj"])
+    assert sorted(p.pk for p in found) == sorted(p.pk for p in posts), (
+        "Убедитесь, что во время перестройки индекса поиск находит"
+        " ещё не переиндексированные публикации."
+    )
+    assert list(rebuild) == [2]
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {FTS_TABLE}")
+        assert cursor.fetchone() == (2,), (
+            "Убедитесь, что перестройка удаляет строки удалённых публикаций."
+        )
@@ -0,0 +1,100 @@
+import os
+
+import pytest
+from django.core.management import call_command
+from django.db.models import QuerySet
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def sitemap_root(settings, tmp_path):
+    settings.SITEMAP_ROOT = tmp_path
+    settings.SITEMAP_BASE_URL = "https://blogicum.example"
+    return tmp_path
+
+
+def test_sitemaps_are_sharded(
+        client, sitemap_root, many_posts_with_published_locations,
+        posts_with_unpublished_category
+):
+    posts = many_posts_with_published_locations
+    call_command("build_sitemaps", "--shard-size", "5")
+    index = client.get("/sitemap.xml")
+    assert index.status_code == 200
+    content = b"".join(index.streaming_content).decode()
+    assert "https://blogicum.example/sitemaps/posts-0.xml" in content
+    assert "/sitemaps/categories-0.xml" in content
+    assert "/sitemaps/profiles-0.xml" in content
+    listed = ""
+    for name in sorted(os.listdir(sitemap_root)):
+        if name.startswith("posts-"):
+            response = client.get(f"/sitemaps/{name}")
+            assert response.status_code == 200
+            listed += b"".join(response.streaming_content).decode()
+    for post in posts:
+        assert f"https://blogicum.example/posts/{post.id}/<" in listed, (
+            "Убедитесь, что карта сайта содержит ссылки на все"
+            " опубликованные записи."
+        )
+    for post in posts_with_unpublished_category:
+        assert f"/posts/{post.id}/<" not in listed
+
+
+def test_unchanged_shards_are_kept(
+        client, sitemap_root, many_posts_with_published_locations
+):
+    posts = many_posts_with_published_locations
+    call_command("build_sitemaps", "--shard-size", "5")
+    first = {
+        name: os.stat(sitemap_root / name).st_mtime_ns
+        for name in os.listdir(sitemap_root) if name.startswith("posts-")
+    }
+    last = max(posts, key=lambda post: post.pk)
+    # Снятая с публикации запись пропадает из своего файла
+    type(last).objects.filter(pk=last.pk).update(is_published=False)
+    changed_name = f"posts-{(last.pk - 1) // 5}.xml"
+    call_command("build_sitemaps", "--shard-size", "5")
+    for name, mtime in first.items():
+        current = os.stat(sitemap_root / name).st_mtime_ns
+        if name == changed_name:
+            assert current != mtime, (
+                "Убедитесь, что файл с изменённой записью перезаписывается."
+            )
+        else:
+            assert current == mtime, (
+                "Убедитесь, что неизменившиеся файлы карты сайта не"
+                " перезаписываются."
+            )
+    response = client.get(
+        f"/sitemaps/{changed_name}",
+        HTTP_IF_MODIFIED_SINCE="Sun, 17 Oct 2100 00:00:00 GMT"
+    )
+    assert response.status_code == 304
+
+
+
+def test_visibility_swap_rewrites_shard(
+        sitemap_root, many_posts_with_published_locations
+):
+    posts = sorted(many_posts_with_published_locations, key=lambda p: p.pk)
+    Post = type(posts[0])
+    # Две записи из одного файла
+    hidden, shown = next(
+        (first, second) for first, second in zip(posts, posts[1:])
+        if (first.pk - 1) // 5 == (second.pk - 1) // 5
+    )
+    # Видимость меняется в обход sync_visibility: ни число строк,
+    # ни updated_at файла не меняются
+    QuerySet.update(Post.objects.filter(pk=shown.pk), is_visible=False)
+    call_command("build_sitemaps", "--shard-size", "5")
+    name = f"posts-{(hidden.pk - 1) // 5}.xml"
+    QuerySet.update(Post.objects.filter(pk=hidden.pk), is_visible=False)
+    QuerySet.update(Post.objects.filter(pk=shown.pk), is_visible=True)
+    call_command("build_sitemaps", "--shard-size", "5")
+    content = (sitemap_root / name).read_text()
+    assert f"/posts/{shown.pk}/<" in content, (
+        "Убедитесь, что файл карты сайта перезаписывается, когда одна"
+        " запись скрывается, а другая открывается."
+    )
+    assert f"/posts/{hidden.pk}/<" not in content
@@ -0,0 +1,61 @@
+import pytest
+from django.db import connection
+
+from blog.benchmark import sqlite_contention
+from blog.db import check_connections, pragma_statements
+
+
+def test_pragma_statements_order_and_validation():
+    statements = list(pragma_statements({
+        'temp_store': 'memory', 'journal_mode': 'wal', 'busy_timeout': 100,
+    }))
+    assert statements == [
+        'PRAGMA busy_timeout = 100',
+        'PRAGMA journal_mode = wal',
+        'PRAGMA temp_store = memory',
+    ]
+    with pytest.raises(ValueError):
+        list(pragma_statements({'journal_mode': 'wal; DROP TABLE x'}))
+
+
+@pytest.mark.django_db
+def test_connection_gets_pragmas(settings):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA busy_timeout')
+        busy_timeout = cursor.fetchone()[0]
+        cursor.execute('PRAGMA temp_store')
+        temp_store = cursor.fetchone()[0]
+    assert busy_timeout == settings.SQLITE_PRAGMAS['busy_timeout'], (
+        "Убедитесь, что новому соединению выставляется busy_timeout."
+    )
+    assert temp_store == 2, (
+        "Убедитесь, что временные таблицы SQLite хранятся в памяти."
+    )
+
+
+@pytest.mark.django_db
+def test_unusable_persistent_connection_is_closed(monkeypatch):
+    connection.ensure_connection()
+    monkeypatch.setitem(connection.settings_dict, 'CONN_HEALTH_CHECKS', True)
+    monkeypatch.setattr(connection, 'close_at', 0)
+    monkeypatch.setattr(connection, 'is_usable', lambda: False)
+    closed = []
+    monkeypatch.setattr(connection, 'close', lambda: closed.append(True))
+    check_connections()
+    assert closed, (
+        "Убедитесь, что неработающее постоянное соединение закрывается "
+        "в начале запроса."
+    )
+
+
+def test_sqlite_contention_with_wal(tmp_path, settings):
+    results = sqlite_contention(
+        str(tmp_path / 'bench.sqlite3'), settings.SQLITE_PRAGMAS,
+        readers=2, writers=2, seconds=0.3, posts=50,
+    )
+    assert set(results) == {'read', 'write'}
+    assert results['write']['ops_per_second'] > 0
+    assert results['write']['errors'] == 0, (
+        "Убедитесь, что в режиме WAL запись не получает "
+        "«database is locked»."
+    )
@@ -0,0 +1,50 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _visible(post):
+    post.refresh_from_db()
+    return post.is_visible
+
+
+def test_category_unpublish_hides_posts(post_with_published_location):
+    post = post_with_published_location
+    category = post.category
+    assert _visible(post)
+    category.is_published = False
+    category.save()
+    assert not _visible(post), (
+        "Убедитесь, что снятие категории с публикации скрывает её посты."
+    )
+    type(category).objects.filter(pk=category.pk).update(is_published=True)
+    assert _visible(post), (
+        "Убедитесь, что публикация категории через update() снова"
+        " показывает её посты."
+    )
+
+
+def test_post_queryset_update_recomputes_visibility(
+        post_with_published_location
+):
+    post = post_with_published_location
+    type(post).objects.filter(pk=post.pk).update(is_published=False)
+    assert not _visible(post)
+
+
+def test_category_delete_hides_posts(post_with_published_location):
+    post = post_with_published_location
+    post.category.delete()
+    assert not _visible(post)
+
+
+def test_check_visibility_command(post_with_published_location):
+    post = post_with_published_location
+    type(post).objects.filter(pk=post.pk).update(is_visible=False)
+    with pytest.raises(CommandError):
+        call_command("check_visibility")
+    call_command("check_visibility", "--fix")
+    assert _visible(post)
+    call_command("check_visibility")
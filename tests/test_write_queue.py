@@ -0,0 +1,174 @@
+import fcntl
+import threading
+import time
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+
+from blog import writer
+from blog.models import Comment
+
+User = get_user_model()
+
+
+@pytest.fixture
+def write_queue(settings, tmp_path, monkeypatch):
+    settings.BLOG_WRITE_QUEUE = True
+    settings.BLOG_WRITE_QUEUE_SIZE = 1
+    settings.BLOG_WRITE_TIMEOUT = 5
+    settings.BLOG_WRITE_LOCK_FILE = str(tmp_path / 'write.lock')
+    # Свой поток записи на каждый тест: размер очереди из настроек
+    monkeypatch.setattr(writer, '_executor', None)
+    monkeypatch.setattr(writer, '_slots', None)
+    monkeypatch.setattr(writer, '_lock_file', None)
+    yield
+    if writer._executor is not None:
+        writer._executor.shutdown(wait=True)
+    if writer._lock_file is not None:
+        writer._lock_file.close()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comment_is_saved_by_writer_thread(
+        write_queue, user_client, post_with_published_location
+):
+    threads = []
+
+    def remember_thread(sender, **kwargs):
+        threads.append(threading.current_thread().name)
+
+    post_save.connect(remember_thread, sender=Comment)
+    try:
+        response = user_client.post(
+            f'/posts/{post_with_published_location.id}/comment/',
+            {'text': 'Через очередь'}
+        )
+    finally:
+        post_save.disconnect(remember_thread, sender=Comment)
+    assert response.status_code == 302
+    assert Comment.objects.filter(text='Через очередь').exists()
+    assert threads and threads[0].startswith('blog-writer'), (
+        "Убедитесь, что при BLOG_WRITE_QUEUE комментарий сохраняется "
+        "в потоке записи."
+    )
+
+
+def run_blocking_job(started, release):
+    def job():
+        started.set()
+        release.wait(5)
+        return 'done'
+
+    result = {}
+    thread = threading.Thread(
+        target=lambda: result.update(value=writer.run_serialized(job))
+    )
+    thread.start()
+    started.wait(5)
+    return thread, result
+
+
+@pytest.mark.django_db(transaction=True)
+def test_full_queue_and_timeout(write_queue, settings):
+    started, release = threading.Event(), threading.Event()
+    thread, result = run_blocking_job(started, release)
+    try:
+        # Поток записи занят, единственное место в очереди тоже
+        with pytest.raises(writer.WriteQueueFull):
+            writer.run_serialized(lambda: None)
+    finally:
+        release.set()
+        thread.join()
+    assert result['value'] == 'done'
+
+    settings.BLOG_WRITE_QUEUE_SIZE = 2
+    writer._executor.shutdown(wait=True)
+    writer._executor = writer._slots = None
+    settings.BLOG_WRITE_TIMEOUT = 0.05
+    started, release = threading.Event(), threading.Event()
+    thread, result = run_blocking_job(started, release)
+    calls = []
+    try:
+        with pytest.raises(writer.WriteTimeout):
+            writer.run_serialized(lambda: calls.append(True))
+    finally:
+        release.set()
+        thread.join()
+    writer._executor.shutdown(wait=True)
+    assert not calls, (
+        "Убедитесь, что запись, не дождавшаяся очереди, не выполняется."
+    )
+
+
+def test_disabled_queue_runs_inline(settings):
+    settings.BLOG_WRITE_QUEUE = False
+    assert writer.run_serialized(threading.current_thread) is (
+        threading.current_thread()
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_only_the_write_goes_through_the_queue(
+        write_queue, monkeypatch, user, user_client,
+        post_with_published_location
+):
+    threads = []
+
+    def remember_thread(sender, **kwargs):
+        threads.append(threading.current_thread().name)
+
+    post_save.connect(remember_thread, sender=User)
+    try:
+        response = user_client.post('/profile/edit/', {
+            'first_name': 'Имя', 'last_name': 'Фамилия',
+            'username': user.username, 'email': 'user@example.com',
+        })
+    finally:
+        post_save.disconnect(remember_thread, sender=User)
+    assert response.status_code == 302
+    assert threads and threads[0].startswith('blog-writer'), (
+        "Убедитесь, что правка профиля тоже сохраняется в потоке записи."
+    )
+
+    def no_writer():
+        raise AssertionError('writer used')
+
+    monkeypatch.setattr(writer, 'get_executor', no_writer)
+    response = user_client.post(
+        f'/posts/{post_with_published_location.id}/edit/', {'title': ''}
+    )
+    assert response.status_code == 200, (
+        "Убедитесь, что проверка формы и рендер шаблона выполняются"
+        " вне потока записи."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_queue_and_lock_share_one_deadline(write_queue, settings):
+    settings.BLOG_WRITE_QUEUE_SIZE = 2
+    settings.BLOG_WRITE_TIMEOUT = 0.3
+    lock_path = settings.BLOG_WRITE_LOCK_FILE
+    # Занимающая поток запись идёт без файловой блокировки
+    settings.BLOG_WRITE_LOCK_FILE = ''
+    started, release = threading.Event(), threading.Event()
+    thread, result = run_blocking_job(started, release)
+    settings.BLOG_WRITE_LOCK_FILE = lock_path
+    # Блокировку держит «другой процесс»
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        timer = threading.Timer(0.2, release.set)
+        timer.start()
+        started_at = time.monotonic()
+        try:
+            with pytest.raises(writer.WriteTimeout):
+                writer.run_serialized(lambda: None)
+        finally:
+            elapsed = time.monotonic() - started_at
+            release.set()
+            thread.join()
+            timer.cancel()
+    assert elapsed < 0.45, (
+        "Убедитесь, что ожидание очереди и блокировки ограничено одним"
+        " BLOG_WRITE_TIMEOUT на двоих."
+    )